@@ -0,0 +1,190 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+_missing = object()
+
+
+class LRUCache:
+    """A bounded mapping that evicts the least recently used entries.
+
+    Counts hits, misses and evictions. None is cached like any other value.
+    The cache can be shared between threads. Values are computed without
+    holding the lock, so two threads may compute the same missing value
+    at the same time.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Return the cached value for key, or compute(), cache and return it."""
+        with self.lock:
+            value = self.data.get(key, _missing)
+            if value is not _missing:
+                self.hits += 1
+                self.data.move_to_end(key)
+                return value
+            self.misses += 1
+
+        value = compute()
+        with self.lock:
+            self.data[key] = value
+            if len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def cache_info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self.data))
+
+    def cache_clear(self):
+        with self.lock:
+            self.data.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+
+class PersistentCache:
+    """A cache of strings that is stored in an SQLite database.
+
+    Values are looked up in a bounded in-memory LRUCache of maxsize entries
+    first and in the database on a miss, so a restarted process finds the
+    values computed by earlier runs without reading the whole file. New
+    entries are written to the database in batches of batch_size and on
+    flush().
+
+    The file records when each version was last used. Entries of versions
+    that have not been used for max_age seconds are deleted when a cache is
+    opened, so processes running different versions can share a file
+    without discarding each other's entries.
+
+    Several processes can use the same file at the same time. Each process
+    sees the entries that the others have written to the database. Every
+    thread and process opens its own connection, so an instance can be
+    shared between threads and inherited by forked processes.
+    """
+
+    def __init__(self, path, version, batch_size=256, max_age=7 * 24 * 3600, maxsize=65536):
+        self.path = str(path)
+        self.version = version
+        self.batch_size = batch_size
+        self.memory = LRUCache(maxsize)
+        self.misses = 0
+        # Entries that have not been written to the database yet
+        self.pending = {}
+        self.lock = threading.Lock()
+        self._local = threading.local()
+        db = self._connect()
+        try:
+            with db:
+                db.execute('CREATE TABLE IF NOT EXISTS entries '
+                           '(version TEXT, key TEXT, value TEXT, PRIMARY KEY (version, key)) '
+                           'WITHOUT ROWID')
+                db.execute('CREATE TABLE IF NOT EXISTS versions '
+                           '(version TEXT PRIMARY KEY, last_used REAL)')
+                self._touch(db)
+                expired = time.time() - max_age
+                db.execute('DELETE FROM entries WHERE version NOT IN '
+                           '(SELECT version FROM versions WHERE last_used >= ?)', (expired,))
+                db.execute('DELETE FROM versions WHERE last_used < ?', (expired,))
+        finally:
+            db.close()
+
+    def get(self, key, compute):
+        """Return the cached value for key, or compute(), cache and return it.
+
+        key and the value returned by compute() must be strings.
+        """
+        return self.memory.get(key, lambda: self._get_stored(key, compute))
+
+    def flush(self):
+        """Write the new entries to the database."""
+        with self.lock:
+            self._write_pending()
+
+    def cache_info(self):
+        memory = self.memory.cache_info()
+        hits = memory.hits + memory.misses - self.misses
+        return CacheInfo(hits, self.misses, memory.evictions, memory.maxsize, memory.currsize)
+
+    def _get_stored(self, key, compute):
+        value = self._lookup(key)
+        if value is not None:
+            return value
+
+        with self.lock:
+            self.misses += 1
+        value = compute()
+        with self.lock:
+            self.pending[key] = value
+            if len(self.pending) >= self.batch_size:
+                self._write_pending()
+        return value
+
+    def _lookup(self, key):
+        with self.lock:
+            value = self.pending.get(key)
+        if value is None:
+            rows = self._reader().execute('SELECT value FROM entries WHERE version = ? AND key = ?',
+                                          (self.version, key)).fetchall()
+            if rows:
+                value = rows[0][0]
+        return value
+
+    def _connect(self):
+        # WAL lets readers and a writer of other processes work concurrently
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def _reader(self):
+        # SQLite connections must not cross threads or forks
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            db = self._connect()
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def _touch(self, db):
+        db.execute('INSERT OR REPLACE INTO versions VALUES (?, ?)', (self.version, time.time()))
+
+    def _write_pending(self):
+        if self.pending:
+            db = self._connect()
+            try:
+                with db:
+                    db.executemany('INSERT OR IGNORE INTO entries VALUES (?, ?, ?)',
+                                   [(self.version, key, value) for key, value in self.pending.items()])
+                    self._touch(db)
+            finally:
+                db.close()
+            self.pending = {}
+
+    def __len__(self):
+        with self.lock:
+            pending = len(self.pending)
+        rows = self._reader().execute('SELECT COUNT(*) FROM entries WHERE version = ?',
+                                      (self.version,)).fetchall()
+        return rows[0][0] + pending
+
+    def __contains__(self, key):
+        return key in self.memory or self._lookup(key) is not None
@@ -0,0 +1,61 @@
+"""Interned, immutable bundles of inflection features."""
+
+_bundles = {}
+
+
+class FeatureBundle(dict):
+    """An immutable dict of inflection features, such as case and number.
+
+    Bundles are interned: FeatureBundle.of() returns the same object for
+    equal features. Bundles therefore hash by identity, which makes them
+    cheap dictionary keys, and merge() can memoize its results per pair of
+    bundles. A bundle compares equal to a plain dict with the same items.
+
+    The interning table is never emptied. A grammar only produces a small,
+    fixed set of feature combinations.
+    """
+
+    __slots__ = ('key', '_merges')
+
+    @staticmethod
+    def of(features=(), **kwargs):
+        """Return the bundle of the given features (a mapping or keywords)."""
+        if isinstance(features, FeatureBundle) and not kwargs:
+            return features
+
+        features = dict(features, **kwargs)
+        key = tuple(sorted(features.items()))
+        bundle = _bundles.get(key)
+        if bundle is None:
+            bundle = FeatureBundle(features)
+            # dict.__init__ does not go through __setitem__
+            bundle.key = key
+            bundle._merges = {}
+            bundle = _bundles.setdefault(key, bundle)
+        return bundle
+
+    def merge(self, override):
+        """Return the bundle of self updated with the features of override.
+
+        override must be a bundle.
+        """
+        merged = self._merges.get(override)
+        if merged is None:
+            merged = FeatureBundle.of({**self, **override})
+            self._merges[override] = merged
+        return merged
+
+    __hash__ = object.__hash__
+
+    def __reduce__(self):
+        # Unpickled bundles are interned in the receiving process
+        return (FeatureBundle.of, (dict(self),))
+
+    def __repr__(self):
+        return f'FeatureBundle({dict.__repr__(self)})'
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('FeatureBundle is immutable')
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
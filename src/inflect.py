@@ -1,8 +1,16 @@
-import re
+import atexit
+import functools
+import hashlib
+from pathlib import Path
 from typing import Literal, Optional
-from voikko import libvoikko
-from voikko.inflect_word import inflect_word, WORD_CLASSES
-from voikko.voikkoutils import VOWEL_BACK, get_wordform_infl_vowel_type
+from .cache import LRUCache, PersistentCache
+from .features import FeatureBundle
+from . import morphology
+from .morphology import VoikkoBackend
+
+# Same as voikko.voikkoutils.VOWEL_BACK. Voikko modules are imported on first
+# use, because reading Voikko's word list dominates the import time.
+VOWEL_BACK = 2
 
 case_affixes = {
     'Nom': '',
@@ -159,7 +167,354 @@ ei_conjugation = {
     '4_Plur_Imp': 'älköön',
 }
 
-voikko = libvoikko.Voikko('fi')
+# The source of paradigms, inflection classes and analyses. See
+# src/morphology.py and set_backend().
+backend = VoikkoBackend()
+
+# Paradigms generated by the backend, keyed by (token, classes, required_wclass)
+paradigm_cache = LRUCache(maxsize=4096)
+
+# LexemeProfiles, keyed like paradigm_cache
+profile_cache = LRUCache(maxsize=4096)
+
+# Compound word splits (modifier, element) loaded by load_compound_splits()
+# and a cache for the words that are not in it
+compound_splits = {}
+compound_split_cache = LRUCache(maxsize=16384)
+persistent_cache = None
+
+def inflect_word(token, classes=None, required_wclass=None):
+    """Return the paradigm of a lexeme as a dict of form name -> form.
+
+    Memoized version of backend.paradigm(), which by default is
+    voikko.inflect_word.inflect_word. The returned dict is shared between
+    callers and must not be modified. Use paradigm_cache.cache_info() to
+    see the hit, miss and eviction counts.
+    """
+    key = (token, tuple(classes) if classes is not None else None, required_wclass)
+    return paradigm_cache.get(key, lambda: backend.paradigm(token, classes, required_wclass))
+
+
+def set_backend(new_backend):
+    """Get paradigms, inflection classes and analyses from new_backend.
+
+    Clears the caches that hold results of the previous backend. Open the
+    persistent cache after setting the backend, because its version
+    depends on the backend.
+    """
+    global backend
+    backend = new_backend
+    clear_caches()
+
+
+def clear_caches():
+    """Clear the in-memory caches of paradigms, stems and inflected forms.
+
+    The precomputed compound splits and the persistent cache are kept.
+    """
+    paradigm_cache.cache_clear()
+    profile_cache.cache_clear()
+    compound_split_cache.cache_clear()
+    _olla_table.cache_clear()
+    _pronoun_table.cache_clear()
+    _negation_verb_table.cache_clear()
+    _infl_vowel_type.cache_clear()
+    replace_vowel_placeholders.cache_clear()
+
+
+class LexemeProfile:
+    """Stems and other properties derived from the paradigm of a lexeme.
+
+    Built once per lexeme by lexeme_profile(), so that the inflection
+    functions do not need to derive them again for every form.
+    """
+
+    __slots__ = ('token', 'forms', 'strong_vowel_stem', 'consonant_or_vowel_stem',
+                 'is_supistuma', 'has_two_syllables', 'degree_roots')
+
+    def __init__(self, token, forms):
+        self.token = token
+        self.forms = forms
+        self.strong_vowel_stem = _vowel_stem(forms, strong=True)
+        self.consonant_or_vowel_stem = _consonant_or_vowel_stem_verb(forms, strong=True)
+        self.is_supistuma = _is_supistuma_verbi(forms, self.strong_vowel_stem)
+        self.has_two_syllables = _has_two_syllables_inaccurate(token)
+        self.degree_roots = {}
+
+    def degree_root(self, degree):
+        """Return the root of the comparative or superlative, its inflection
+        classes and the vowel type of the positive."""
+        root = self.degree_roots.get(degree)
+        if root is None:
+            root = _degree_root(self, degree) + (_infl_vowel_type(self.forms['genetiivi']),)
+            self.degree_roots[degree] = root
+        return root
+
+
+def lexeme_profile(token, classes=None, required_wclass=None):
+    """Return the LexemeProfile of a lexeme.
+
+    The arguments are the same as for inflect_word().
+    """
+    key = (token, tuple(classes) if classes is not None else None, required_wclass)
+    return profile_cache.get(
+        key,
+        lambda: LexemeProfile(token, inflect_word(token, classes=classes,
+                                                  required_wclass=required_wclass)))
+
+
+def word_classes():
+    """Return the backend's table of lexemes and their inflection classes.
+
+    Voikko's word list is read and patched on first use.
+    """
+    return backend.word_classes()
+
+
+def open_persistent_cache(path):
+    """Keep the forms inflected by inflect() in an SQLite database at path.
+
+    The forms are read back by later runs and by other processes that open
+    the same file. The forms are stored per cache_version(), so they are
+    not used after the inflection code or the data of the backend changes.
+    Forms of versions that have not been used for a week are deleted.
+    Returns the PersistentCache.
+    """
+    global persistent_cache
+    close_persistent_cache()
+    persistent_cache = PersistentCache(path, cache_version())
+    return persistent_cache
+
+
+def close_persistent_cache():
+    """Write the pending forms to the persistent cache and stop using it."""
+    global persistent_cache
+    if persistent_cache is not None:
+        persistent_cache.flush()
+        persistent_cache = None
+
+
+atexit.register(close_persistent_cache)
+
+
+def cache_version():
+    """Return a hash of the inflection source code and the backend's data."""
+    h = hashlib.sha256()
+    h.update(Path(__file__).read_bytes())
+    h.update(Path(morphology.__file__).read_bytes())
+    h.update(backend.version().encode('utf-8'))
+    return h.hexdigest()
+
+
+def __getattr__(name):
+    # WORD_CLASSES used to be imported from Voikko at module load
+    if name == 'WORD_CLASSES':
+        return word_classes()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def inflect(lexeme: str, word_class: str, features: dict) -> str:
+    """Inflect a lexeme of the given word class.
+
+    word_class is one of the vocabulary word classes (teonsana, nimisana,
+    laatusana, lukusana, asemosana, ...). features is a dict or a
+    FeatureBundle of the keyword arguments of conjugate_verb,
+    inflect_nominal or inflect_pronoun.
+    Missing features are passed as None. Lexemes of other word classes
+    are returned as is.
+    """
+    if persistent_cache is not None and word_class in inflected_word_classes:
+        if isinstance(features, FeatureBundle):
+            items = features.key
+        else:
+            items = tuple(sorted(features.items()))
+        key = repr((lexeme, word_class, items))
+        return persistent_cache.get(key, lambda: _inflect(lexeme, word_class, features))
+    return _inflect(lexeme, word_class, features)
+
+
+inflected_word_classes = frozenset(['teonsana', 'laatusana', 'lukusana', 'nimisana', 'asemosana'])
+
+
+def _inflect(lexeme, word_class, features):
+    if word_class == 'teonsana':
+        return conjugate_verb(
+            lexeme,
+            tense=features.get('tense'),
+            person=features.get('person'),
+            number=features.get('number'),
+            mood=features.get('mood'),
+            infform=features.get('infform'),
+            partform=features.get('partform'),
+            connegative=features.get('connegative'))
+    elif word_class in ['laatusana', 'lukusana', 'nimisana']:
+        return inflect_nominal(
+            lexeme,
+            case=features.get('case'),
+            number=features.get('number'),
+            degree=features.get('degree'),
+            person_psor=features.get('person_psor'),
+            number_psor=features.get('number_psor'))
+    elif word_class == 'asemosana':
+        return inflect_pronoun(
+            lexeme,
+            case=features.get('case'),
+            number=features.get('number'))
+    else:
+        return lexeme
+
+
+def inflect_many(requests) -> list:
+    """Inflect a batch of (lexeme, word_class, features) requests.
+
+    Identical requests are inflected only once. The requests are processed
+    grouped by lexeme, so the distinct forms of a lexeme are inflected one
+    after another and find its paradigm in paradigm_cache. Each distinct
+    form is still inflected with a separate inflect() call. Returns the
+    inflected forms in the input order. See inflect() for the meaning of
+    word_class and features.
+    """
+    requests = list(requests)
+    by_lexeme = {}
+    for i, (lexeme, _, _) in enumerate(requests):
+        by_lexeme.setdefault(lexeme, []).append(i)
+
+    results = [None] * len(requests)
+    for lexeme, indices in by_lexeme.items():
+        forms = {}
+        for i in indices:
+            _, word_class, features = requests[i]
+            # Interned bundles are cheaper keys than the sorted items
+            if isinstance(features, FeatureBundle):
+                key = (word_class, features)
+            else:
+                key = (word_class, tuple(sorted(features.items())))
+            if key not in forms:
+                forms[key] = inflect(lexeme, word_class, features)
+            results[i] = forms[key]
+    return results
+
+
+nominal_paradigm_features = ('case', 'number', 'degree', 'person_psor', 'number_psor')
+verb_paradigm_features = ('tense', 'person', 'number', 'mood', 'infform', 'partform', 'connegative')
+
+possessors = (('1', 'Sing'), ('2', 'Sing'), ('1', 'Plur'), ('2', 'Plur'), ('3', None))
+
+
+def _verb_paradigm_keys():
+    keys = []
+    for connegative in (False, True):
+        for mood in ('Ind', 'Cnd', 'Imp', 'Pot'):
+            for tense in (('Pres', 'Past') if mood == 'Ind' else (None,)):
+                for person in ('1', '2', '3', '4'):
+                    if connegative and mood == 'Pot' and person == '4':
+                        # not supported by conjugate_verb
+                        continue
+                    for number in ('Sing', 'Plur'):
+                        keys.append((tense, person, number, mood, None, None, connegative))
+    keys.append((None, None, None, None, '1', None, False))
+    for person, number, partform in [(None, None, 'Pres'), ('4', None, 'Pres'),
+                                     (None, 'Sing', 'Past'), (None, 'Plur', 'Past'),
+                                     ('4', None, 'Past'), (None, None, 'Agt')]:
+        keys.append((None, person, number, None, None, partform, False))
+    return tuple(keys)
+
+
+verb_paradigm_keys = _verb_paradigm_keys()
+
+
+def _verb_paradigm_key(tense, person, number, mood, infform, partform, connegative):
+    """Return the key of the verb_paradigm() entry for conjugate_verb() arguments.
+
+    Drops the features that do not affect the form. The key is not in the
+    table if the arguments are not supported.
+    """
+    if connegative:
+        return (tense if mood == 'Ind' else None, person, number, mood, None, None, True)
+    elif infform:
+        return (None, None, None, None, infform, None, False)
+    elif partform:
+        person = '4' if person == '4' else None
+        number = number if partform == 'Past' and person is None else None
+        return (None, person, number, None, None, partform, False)
+    else:
+        return (tense if mood == 'Ind' else None, person, number, mood, None, None, False)
+
+
+def nominal_paradigm(lexeme: str, degrees=(None, 'Cmp', 'Sup')) -> dict:
+    """Return all forms of a nominal that inflect_nominal supports.
+
+    The table is keyed by tuples of the features in nominal_paradigm_features.
+    degree is None for the positive and person_psor and number_psor are None
+    for forms without a possessive suffix. The value of each key is the same
+    as the result of inflect_nominal(lexeme, **dict(zip(nominal_paradigm_features, key))),
+    but the Voikko paradigm and the stems are looked up only once.
+
+    Only the forms of the given degrees are included. Pass degrees=(None,)
+    for nouns and numerals, which are not compared.
+    """
+    if backend.inflection_classes(lexeme) is None:
+        modifier, element = _split_compound_word(lexeme)
+    else:
+        modifier = ''
+        element = lexeme
+
+    positive = lexeme_profile(element, required_wclass='subst')
+    table = {}
+    for degree in degrees:
+        has_degree = degree is not None and 'genetiivi' in positive.forms
+        if has_degree:
+            root, inflection_classes, vowel_type = positive.degree_root(degree)
+            degree_profiles = {}
+
+        for number in ('Sing', 'Plur'):
+            for case, case_name in expand_case_name.items():
+                if has_degree:
+                    affix = _degree_affix(element, degree, case, number)
+                    if affix not in degree_profiles:
+                        form = root + replace_vowel_placeholders(affix, vowel_type)
+                        degree_profiles[affix] = (form, lexeme_profile(form, inflection_classes,
+                                                                       required_wclass='subst'))
+                    form, profile = degree_profiles[affix]
+                else:
+                    form, profile = element, positive
+
+                key = case_name + '_mon' if number == 'Plur' else case_name
+                form = profile.forms.get(key, form)
+                table[(case, number, degree, None, None)] = modifier + form
+
+                # The first and second person suffixes replace the same
+                # final n, see _append_possessive_suffix()
+                stem = _possessive_stem(profile, form, case, number)
+                stem12 = modifier + (stem[:-1] if stem.endswith('n') else stem)
+                for person_psor, number_psor in possessors[:-1]:
+                    psor_key = person_psor + '_' + number_psor
+                    form = stem12 + possessive_suffixes[psor_key]
+                    table[(case, number, degree, person_psor, number_psor)] = form
+                form = _append_possessive_suffix(element, stem, case, '3', None)
+                table[(case, number, degree, '3', None)] = modifier + form
+
+    return table
+
+
+def verb_paradigm(lexeme: str) -> dict:
+    """Return all forms of a verb that conjugate_verb supports.
+
+    The table is keyed by tuples of the features in verb_paradigm_features.
+    Features that do not apply to a form are None: tense is None outside
+    of the indicative and mood is None for the infinitive and the
+    participles. The value of each key is the same as the result of
+    conjugate_verb(lexeme, **dict(zip(verb_paradigm_features, key))), but
+    the Voikko paradigm is looked up only once. The table of the negation
+    verb "ei" contains only the finite forms.
+    """
+    if lexeme == 'ei':
+        return {key: _conjugate_negation_verb(key[1], key[2], key[3])
+                for key in verb_paradigm_keys if key[3] is not None and not key[6]}
+
+    profile = lexeme_profile(lexeme, required_wclass='verbi')
+    return {key: _conjugate_verb_forms(lexeme, profile, *key) for key in verb_paradigm_keys}
+
 
 def conjugate_verb(token: str,
                    *,
@@ -173,29 +528,42 @@ def conjugate_verb(token: str,
     if token == 'ei':
         return _conjugate_negation_verb(person, number, mood)
 
-    elif connegative:
-        return _conjugate_verb_connegative(token, tense, person, mood, number)
+    elif token == 'olla':
+        key = _verb_paradigm_key(tense, person, number, mood, infform, partform, connegative)
+        form = _olla_table().get(key)
+        if form is not None:
+            return form
+
+    profile = lexeme_profile(token, required_wclass='verbi')
+    return _conjugate_verb_forms(token, profile, tense, person, number, mood,
+                                 infform, partform, connegative)
+
+
+def _conjugate_verb_forms(token, profile, tense, person, number, mood,
+                          infform, partform, connegative):
+    if connegative:
+        return _conjugate_verb_connegative(token, profile, tense, person, mood, number)
 
     elif infform:
         return _conjugate_verb_infinite(token, infform)
 
     elif partform:
-        return _conjugate_verb_participle(token, person, number, partform)
+        return _conjugate_verb_participle(token, profile, person, number, partform)
 
     elif person == '4':
-        return _conjugate_verb_passive(token, tense, number, mood)
+        return _conjugate_verb_passive(token, profile, tense, number, mood)
 
     elif mood == 'Cnd':
-        return _conjugate_verb_conditional(token, person, number)
+        return _conjugate_verb_conditional(token, profile, person, number)
 
     elif mood == 'Imp':
-        return _conjugate_verb_imperative(token, person, number)
+        return _conjugate_verb_imperative(token, profile, person, number)
 
     elif mood == 'Pot':
-        return _conjugate_verb_potential(token, person, number)
+        return _conjugate_verb_potential(token, profile, person, number)
 
     else: # mood == 'Ind'
-        return _conjugate_verb_indicative(token, tense, person, number)
+        return _conjugate_verb_indicative(token, profile, tense, person, number)
 
 
 def inflect_nominal(token: str,
@@ -206,7 +574,7 @@ def inflect_nominal(token: str,
                     degree: Optional[Literal['Pos', 'Cmp', 'Sup']] = None,
                     person_psor: Optional[Literal['1', '2', '3']] = None,
                     number_psor: Optional[Literal['Sing', 'Plur']] = None):
-    if token not in WORD_CLASSES:
+    if backend.inflection_classes(token) is None:
         modifier, element = _split_compound_word(token)
     else:
         modifier = ''
@@ -219,58 +587,16 @@ def inflect_nominal(token: str,
 def _inflect_nominal_simple_stem(token, case, number, degree, person_psor, number_psor):
     # FIXME: numerals
     
-    forms = inflect_word(token, required_wclass='subst')
+    profile = lexeme_profile(token, required_wclass='subst')
 
     # Degree (adjectives only)
     # https://kaino.kotus.fi/visk/sisallys.php?p=300
     form = token
-    if degree in ['Cmp', 'Sup'] and 'genetiivi' in forms:
-        inflection_classes = None
-        if token == 'hyvä':
-            affix = ''
-            if degree == 'Cmp':
-                root = 'parempi'
-                inflection_classes = ['subst-suurempi-av1']
-            else:
-                # FIXME: correct cases for the superlative "paras"
-                root = 'paras'
-                inflection_classes = ['subst-vieras'] # this is wrong!
-        else:
-            root = forms['genetiivi'][:-1]
-            if degree == 'Cmp':
-                if _has_two_syllables_inaccurate(token) and root[-1] in 'aä':
-                    root = root[:-1] + 'e'
-            else: # degree == 'Sup'
-                if token in ('uusi', 'täysi', 'tosi'):
-                    root = token[:-1]
-                elif len(root) >= 2 and not is_vowel(root[-2]) and root[-1] in 'aeä':
-                    root = root[:-1]
-                elif len(root) >= 2 and is_vowel(root[-2]) and is_vowel(root[-1]):
-                    root = root[:-1]
-
-                if root[-1] == 'i':
-                    root = root[:-1] + 'e'
-
-            if case == 'Nom' and number == 'Sing':
-                if degree == 'Cmp':
-                    affix = 'mpi'
-                else:
-                    affix = 'in'
-            elif number == 'Sing' or (number == 'Plur' and case == 'Nom'):
-                if degree == 'Cmp':
-                    affix = 'mpA'
-                else:
-                    affix = 'impA'
-            else: # number == 'Plur'
-                if degree == 'Cmp':
-                    affix = 'mpi'
-                else:
-                    affix = 'impi'
-
-        vowel_type = get_wordform_infl_vowel_type(forms['genetiivi'])
-        affix = replace_vowel_placeholders(affix, vowel_type)
-        form = root + affix
-        forms = inflect_word(form, classes=inflection_classes, required_wclass='subst')
+    if degree in ['Cmp', 'Sup'] and 'genetiivi' in profile.forms:
+        root, inflection_classes, vowel_type = profile.degree_root(degree)
+        affix = _degree_affix(token, degree, case, number)
+        form = root + replace_vowel_placeholders(affix, vowel_type)
+        profile = lexeme_profile(form, inflection_classes, required_wclass='subst')
 
     # Case
     # https://kaino.kotus.fi/visk/sisallys.php?p=81
@@ -278,35 +604,98 @@ def _inflect_nominal_simple_stem(token, case, number, degree, person_psor, numbe
     key = expand_case_name.get(case, 'nominatiivi')
     if number == 'Plur':
         key = key + '_mon'
-    form = forms.get(key, form)
+    form = profile.forms.get(key, form)
 
     # Possessive suffix
     # https://kaino.kotus.fi/visk/sisallys.php?p=95
     if person_psor:
-        if case  == 'Nom' or (case == 'Gen' and number == 'Sing'):
-            form = _vowel_stem(forms, strong=True) or form
-        if number == 'Plur' and form.endswith('t'):
+        form = _possessive_stem(profile, form, case, number)
+        form = _append_possessive_suffix(token, form, case, person_psor, number_psor)
+
+    return form
+
+
+def _degree_root(profile, degree):
+    """Return the root of the comparative or superlative and its inflection classes.
+
+    profile is the LexemeProfile of the positive degree.
+    """
+    token = profile.token
+    if token == 'hyvä':
+        if degree == 'Cmp':
+            return 'parempi', ['subst-suurempi-av1']
+        else:
+            # FIXME: correct cases for the superlative "paras"
+            return 'paras', ['subst-vieras'] # this is wrong!
+
+    root = profile.forms['genetiivi'][:-1]
+    if degree == 'Cmp':
+        if profile.has_two_syllables and root[-1] in 'aä':
+            root = root[:-1] + 'e'
+    else: # degree == 'Sup'
+        if token in ('uusi', 'täysi', 'tosi'):
+            root = token[:-1]
+        elif len(root) >= 2 and not is_vowel(root[-2]) and root[-1] in 'aeä':
+            root = root[:-1]
+        elif len(root) >= 2 and is_vowel(root[-2]) and is_vowel(root[-1]):
+            root = root[:-1]
+
+        if root[-1] == 'i':
+            root = root[:-1] + 'e'
+
+    return root, None
+
+
+def _degree_affix(token, degree, case, number):
+    if token == 'hyvä':
+        return ''
+    elif case == 'Nom' and number == 'Sing':
+        if degree == 'Cmp':
+            return 'mpi'
+        else:
+            return 'in'
+    elif number == 'Sing' or (number == 'Plur' and case == 'Nom'):
+        if degree == 'Cmp':
+            return 'mpA'
+        else:
+            return 'impA'
+    else: # number == 'Plur'
+        if degree == 'Cmp':
+            return 'mpi'
+        else:
+            return 'impi'
+
+
+def _possessive_stem(profile, form, case, number):
+    """Return the inflected form without the final consonant that the
+    possessive suffix replaces."""
+    if case  == 'Nom' or (case == 'Gen' and number == 'Sing'):
+        form = profile.strong_vowel_stem or form
+    if number == 'Plur' and form.endswith('t'):
+        form = form[:-1]
+    elif case == 'Tra':
+        # -ksi -> -kse
+        form = form[:-1] + 'e'
+    return form
+
+
+def _append_possessive_suffix(token, form, case, person_psor, number_psor):
+    if person_psor in ['1', '2']:
+        if form.endswith('n'):
             form = form[:-1]
-        elif case == 'Tra':
-            # -ksi -> -kse
-            form = form[:-1] + 'e'
-
-        if person_psor in ['1', '2']:
-            if form.endswith('n'):
-                form = form[:-1]
-            psor_key = person_psor + '_' + (number_psor or 'Sing')
-            form = form + possessive_suffixes[psor_key]
-        elif person_psor == '3':
-            if form.endswith('n'):
-                suffix = 'sA' # nsA, but the 'n' is merged with the root form
-            elif case == 'Nom' or (case == 'Par' and token.endswith('a')):
-                suffix = 'nsA'
-            elif is_vowel(form[-1]):
-                suffix = form[-1] + 'n'
-            else:
-                suffix = 'nsA'
+        psor_key = person_psor + '_' + (number_psor or 'Sing')
+        form = form + possessive_suffixes[psor_key]
+    elif person_psor == '3':
+        if form.endswith('n'):
+            suffix = 'sA' # nsA, but the 'n' is merged with the root form
+        elif case == 'Nom' or (case == 'Par' and token.endswith('a')):
+            suffix = 'nsA'
+        elif is_vowel(form[-1]):
+            suffix = form[-1] + 'n'
+        else:
+            suffix = 'nsA'
 
-            form = _append_affix_with_vowel_harmony(form, suffix)
+        form = _append_affix_with_vowel_harmony(form, suffix)
 
     return form
 
@@ -317,7 +706,14 @@ def inflect_pronoun(token: str,
                                   'Gen', 'Ill', 'Ine', 'Ins', 'Nom', 'Par', 'Tra']='Nom',
                     number: Literal['Sing', 'Plur']='Sing'):
     # https://kaino.kotus.fi/visk/sisallys.php?p=100
+    form = _pronoun_table().get((token, case, number))
+    if form is not None:
+        return form
+
+    return _inflect_pronoun(token, case, number)
 
+
+def _inflect_pronoun(token, case, number):
     key = token + '_' + number
     key_case = key + '_' + case
     if key_case in pronoun_exceptions:
@@ -329,13 +725,14 @@ def inflect_pronoun(token: str,
 
 
 def _conjugate_verb_passive(token: str,
+                            profile: LexemeProfile,
                             tense: Literal['Pres', 'Past'],
                             number: Literal['Sing', 'Plur'],
                             mood: Literal['Ind', 'Cnd', 'Imp', 'Pot'],
                             include_person_affix: bool = True) -> str:
     # https://kaino.kotus.fi/visk/sisallys.php?p=110
 
-    forms = inflect_word(token, required_wclass='verbi')
+    forms = profile.forms
     if 'imperfekti_pass' in forms:
         root = forms['imperfekti_pass'][:-4]
     else:
@@ -367,9 +764,9 @@ def _conjugate_verb_passive(token: str,
     return _append_affix_with_vowel_harmony(root, affix)
 
 
-def _conjugate_verb_indicative(token, tense, person, number):
+def _conjugate_verb_indicative(token, profile, tense, person, number):
     # https://kaino.kotus.fi/visk/sisallys.php?p=107
-    forms = inflect_word(token, required_wclass='verbi')
+    forms = profile.forms
     if tense == 'Pres' and token == 'olla':
         if person == '3':
             stem = 'on' if number == 'Sing' else 'ovat'
@@ -380,7 +777,7 @@ def _conjugate_verb_indicative(token, tense, person, number):
     elif tense == 'Pres':
         if 'preesens_yks_1' in forms:
             if person == '3':
-                stem = _vowel_stem(forms, strong=True)
+                stem = profile.strong_vowel_stem
             else:
                 stem = forms['preesens_yks_1'][:-1]
         else:
@@ -393,7 +790,7 @@ def _conjugate_verb_indicative(token, tense, person, number):
             if _is_diphthong_or_long_vowel(stem[-2:]):
                 affix = ''
             elif ((len(stem) >= 2 and not is_vowel(stem[-2]) and is_vowel(stem[-1])) or
-                  _is_supistuma_verbi(forms)):
+                  profile.is_supistuma):
                 affix = stem[-1]
             else:
                 affix = ''
@@ -408,16 +805,15 @@ def _conjugate_verb_indicative(token, tense, person, number):
                 if (token.endswith('ltaa') or token.endswith('ltää') or
                     token.endswith('rtaa') or token.endswith('rtää') or
                     token.endswith('ntaa') or token.endswith('ntää') or
-                    _is_supistuma_verbi(forms)):
+                    profile.is_supistuma):
                     stem = forms['imperfekti_yks_3']
                 elif len(stem) >= 2 and stem[-1] == stem[-2] and is_vowel(stem[-1]):
                     stem = stem[:-1] + 'i'
                 elif stem.endswith('e') or stem.endswith('ä'):
                     stem = stem[:-1] + 'i'
-                elif _has_one_syllable_inaccurate(stem) and (stem[-2:] == 'ie' or
-                                                             re.match('[uy][oö]', stem[-2:])):
+                elif _has_one_syllable_inaccurate(stem) and stem[-2:] in ('ie', 'uo', 'uö', 'yo', 'yö'):
                     stem = stem[:-2] + stem[-1] + 'i'
-                elif _has_two_syllables_inaccurate(token) and stem[-1] == 'a':
+                elif profile.has_two_syllables and stem[-1] == 'a':
                     fst_vowel = _first_vowel(stem)
                     if fst_vowel == 'a':
                         stem = stem[:-1] + 'oi'
@@ -437,22 +833,56 @@ def _conjugate_verb_indicative(token, tense, person, number):
 
 
 def _conjugate_negation_verb(person, number, mood):
+    form = _negation_verb_table().get((person, number, mood))
+    if form is not None:
+        return form
+
     if mood != 'Imp':
         mood = 'Ind'
 
     return ei_conjugation[f'{person}_{number}_{mood}']
 
 
-def _conjugate_verb_connegative(token, tense, person, mood, number):
+# Closed word classes are inflected once into tables that are built on
+# first use. Feature combinations that are missing from a table fall back
+# to the general code.
+
+@functools.lru_cache(maxsize=None)
+def _pronoun_table():
+    pronouns = {key.split('_')[0] for key in list(pronoun_stems) + list(pronoun_exceptions)}
+    return {(token, case, number): _inflect_pronoun(token, case, number)
+            for token in pronouns
+            for case in expand_case_name
+            for number in ('Sing', 'Plur')}
+
+
+@functools.lru_cache(maxsize=None)
+def _negation_verb_table():
+    table = {}
+    for key, form in ei_conjugation.items():
+        person, number, mood = key.split('_')
+        if mood == 'Ind':
+            for m in ('Ind', 'Cnd', 'Pot'):
+                table[(person, number, m)] = form
+        else:
+            table[(person, number, mood)] = form
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def _olla_table():
+    return verb_paradigm('olla')
+
+
+def _conjugate_verb_connegative(token, profile, tense, person, mood, number):
     # pääverbin kieltomuoto
     # https://kaino.kotus.fi/visk/sisallys.php?p=109
+    forms = profile.forms
     if mood == 'Cnd':
-        forms = inflect_word(token, required_wclass='verbi')
         return forms.get('kondit_yks_3', token)
 
     elif mood == 'Imp':
         # Note: imperative first person singular should never occur
-        forms = inflect_word(token, required_wclass='verbi')
         if person in ('1', '2') and number == 'Sing':
             form = forms.get('preesens_yks_1')
             return form[:-1] if forms else token
@@ -463,17 +893,16 @@ def _conjugate_verb_connegative(token, tense, person, mood, number):
                 stem = token[:-2]
             return _append_affix_with_vowel_harmony(stem, 'kO')
         else: # person == '4'
-            return _conjugate_verb_passive(token, tense, number, 'Imp', include_person_affix = False)
+            return _conjugate_verb_passive(token, profile, tense, number, 'Imp', include_person_affix = False)
 
     elif mood == 'Pot':
-        return _conjugate_verb_potential(token, person, number)
+        return _conjugate_verb_potential(token, profile, person, number)
 
     else: # mood == 'Ind'
-        forms = inflect_word(token, required_wclass='verbi')
         if person == '4' and tense == 'Pres':
-            return _conjugate_verb_passive(token, tense, number, 'Ind', include_person_affix = False)
+            return _conjugate_verb_passive(token, profile, tense, number, 'Ind', include_person_affix = False)
         if person == '4' and tense == 'Past':
-            return _conjugate_verb_participle(token, '4', number, partform='Past')
+            return _conjugate_verb_participle(token, profile, '4', number, partform='Past')
         elif tense == 'Pres': # and person in ('1', '2', '3')
             form = forms.get('preesens_yks_1')
             return form[:-1] if form else token
@@ -498,16 +927,16 @@ def _conjugate_verb_infinite(token, infform):
     return token
 
 
-def _conjugate_verb_participle(token, person, number, partform):
+def _conjugate_verb_participle(token, profile, person, number, partform):
     # https://kaino.kotus.fi/visk/sisallys.php?p=122
-    forms = inflect_word(token, required_wclass='verbi')
+    forms = profile.forms
     if partform == 'Pres':
         if person == '4':
             form = forms.get('imperfekti_pass')
             if form:
                 return _append_affix_with_vowel_harmony(form[:-4], 'tAvA')
         else:
-            stem = _vowel_stem(forms, strong=True) or token
+            stem = profile.strong_vowel_stem or token
             return _append_affix_with_vowel_harmony(stem, 'vA')
 
     elif partform == 'Past':
@@ -523,7 +952,7 @@ def _conjugate_verb_participle(token, person, number, partform):
                 return form
 
     elif partform == 'Agt':
-        stem = _vowel_stem(forms, strong=True) or token
+        stem = profile.strong_vowel_stem or token
         return _append_affix_with_vowel_harmony(stem, 'mA')
 
     else:
@@ -532,17 +961,17 @@ def _conjugate_verb_participle(token, person, number, partform):
     # should not be reached
     return token
 
-def _conjugate_verb_conditional(token, person, number):
+def _conjugate_verb_conditional(token, profile, person, number):
     # https://kaino.kotus.fi/visk/sisallys.php?p=116
-    forms = inflect_word(token, required_wclass='verbi')
+    forms = profile.forms
     stem = forms.get('kondit_yks_3', token)
     affix = verb_person_number_affix[person + '_' + number]
     return _append_affix_with_vowel_harmony(stem, affix)
 
 
-def _conjugate_verb_imperative(token, person, number):
+def _conjugate_verb_imperative(token, profile, person, number):
     # https://kaino.kotus.fi/visk/sisallys.php?p=118
-    forms = inflect_word(token, required_wclass='verbi')
+    forms = profile.forms
     if person == '2' and number == 'Sing':
         if 'preesens_yks_1' in forms:
             stem = forms['preesens_yks_1'][:-1]
@@ -557,13 +986,12 @@ def _conjugate_verb_imperative(token, person, number):
     return _append_affix_with_vowel_harmony(stem, affix)
 
 
-def _conjugate_verb_potential(token, person, number):
+def _conjugate_verb_potential(token, profile, person, number):
     # https://kaino.kotus.fi/visk/sisallys.php?p=117
     if token == 'olla':
         stem = 'lie'
     else:
-        forms = inflect_word(token, required_wclass='verbi')
-        stem = _consonant_or_vowel_stem_verb(forms, strong=True)
+        stem = profile.consonant_or_vowel_stem
     if not stem:
         stem = token[:-2]
 
@@ -573,18 +1001,18 @@ def _conjugate_verb_potential(token, person, number):
     return _append_affix_with_vowel_harmony(stem, affix)
 
 
-def _is_supistuma_verbi(forms):
+def _is_supistuma_verbi(forms, strong_vowel_stem):
     # https://kaino.kotus.fi/visk/sisallys.php?p=330
 
     inf = forms.get('infinitiivi_1', '')
-    vowel_stem = _vowel_stem(forms, strong=True) or inf
+    vowel_stem = strong_vowel_stem or inf
     return ((inf.endswith('ta') or inf.endswith('tä')) and
             len(vowel_stem) >= 2 and is_vowel(vowel_stem[-2]) and
             (vowel_stem[-1] in 'aä' or vowel_stem[-2] == vowel_stem[-1]))
 
 
 def _gradation_type(token):
-    classes = WORD_CLASSES.get(token)
+    classes = backend.inflection_classes(token)
     if classes:
         fields = classes[0].split('-')
         if len(fields) == 3:
@@ -633,54 +1061,89 @@ def _has_suora_astevaihtelu(token):
 
 def _append_affix_with_vowel_harmony(stem, affix):
     """Append affix to stem and replace vowel placeholders (AOU) in the affix."""
-    vowel_type = get_wordform_infl_vowel_type(stem)
+    vowel_type = _infl_vowel_type(stem)
     affix = replace_vowel_placeholders(affix, vowel_type)
     return stem + affix
 
 
+@functools.lru_cache(maxsize=16384)
+def _infl_vowel_type(wordform):
+    from voikko.voikkoutils import get_wordform_infl_vowel_type
+    return get_wordform_infl_vowel_type(wordform)
+
+
 def _has_one_syllable_inaccurate(word):
     return len(word) <= 3
 
 
-diphthong_expression = 'aa|ee|ii|oo|uu|yy|ää|öö|ai|ei|oi|ui|yi|äi|öi|au|eu|iu|ou|äy|öy|iy|ey|ie|uo|yö'
+diphthongs = frozenset([
+    'aa', 'ee', 'ii', 'oo', 'uu', 'yy', 'ää', 'öö', 'ai', 'ei', 'oi', 'ui', 'yi',
+    'äi', 'öi', 'au', 'eu', 'iu', 'ou', 'äy', 'öy', 'iy', 'ey', 'ie', 'uo', 'yö'
+])
+syllable_consonants = frozenset('bcdfghjklmnpqrstvwxz')
+syllable_vowels = frozenset('aeiouyäö')
+vowels = frozenset('aeiouyäöåAEIOUYÄÖÅ')
+
 def _has_two_syllables_inaccurate(word):
     """Does the word have two syllables?
 
     Inaccurate: misdetects some of the less common syllable types."""
-    # the most syllables include CV, VV, or VC
-    syllable_elements = [
-        '[bcdfghjklmnpqrstvwxz][aeiouyäö]',
-        diphthong_expression,
-        '[aeiouyäö][bcdfghjklmnpqrstvwxz]',
-    ]
-    x = sum(1 for _ in re.finditer('|'.join(syllable_elements), word, re.IGNORECASE))
-    return x <= 2
+    # the most syllables include CV, VV, or VC. Count non-overlapping
+    # two-letter matches from left to right.
+    word = word.lower()
+    count = 0
+    i = 0
+    while i < len(word) - 1:
+        a = word[i]
+        b = word[i + 1]
+        if ((a in syllable_consonants and b in syllable_vowels) or
+            a + b in diphthongs or
+            (a in syllable_vowels and b in syllable_consonants)):
+            count += 1
+            i += 2
+        else:
+            i += 1
+    return count <= 2
 
 
 def _is_diphthong_or_long_vowel(two_character_string):
-    return re.fullmatch(diphthong_expression, two_character_string) is not None
+    return two_character_string in diphthongs
 
 
+back_vowel_placeholders = str.maketrans('AOU', 'aou')
+front_vowel_placeholders = str.maketrans('AOU', 'äöy')
+
+# str.translate() is slow compared to a cache lookup, and there are only a
+# few distinct affixes.
+@functools.lru_cache(maxsize=4096)
 def replace_vowel_placeholders(s, vowel_type):
-    def vowel_repl(vowel_class):
-        if vowel_class.group(0) == 'A':
-            return 'a' if vowel_type == VOWEL_BACK else 'ä'
-        elif vowel_class.group(0) == 'O':
-            return 'o' if vowel_type == VOWEL_BACK else 'ö'
-        elif vowel_class.group(0) == 'U':
-            return 'u' if vowel_type == VOWEL_BACK else 'y'
-    return re.sub('[AOU]', vowel_repl, s)
+    if vowel_type == VOWEL_BACK:
+        return s.translate(back_vowel_placeholders)
+    else:
+        return s.translate(front_vowel_placeholders)
 
 
 def _first_vowel(word):
     for c in word:
-        if is_vowel(c):
+        if c in vowels:
             return c
     return None
 
 
 def is_vowel(c):
-    return c.lower() in ['a', 'e', 'i', 'o', 'u', 'y', 'ä', 'ö', 'å']
+    return c in vowels
+
+
+def load_compound_splits(path):
+    """Load precomputed compound word splits.
+
+    The file is written by tools/precompute_compound_splits.py. Words found
+    in it are never analyzed by Voikko.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            word, modifier, element = line.rstrip('\n').split('\t')
+            compound_splits[word] = (modifier, element)
 
 
 def _split_compound_word(compound_word):
@@ -688,7 +1151,15 @@ def _split_compound_word(compound_word):
 
     Works only on compound words recognized by Voikko.
     """
-    analyses = voikko.analyze(compound_word)
+    split = compound_splits.get(compound_word)
+    if split is not None:
+        return split
+
+    return compound_split_cache.get(compound_word, lambda: _analyze_compound_word(compound_word))
+
+
+def _analyze_compound_word(compound_word):
+    analyses = backend.analyze(compound_word)
     if analyses:
         analysis = analyses[0]
         structure = analysis.get('STRUCTURE', '')
@@ -699,12 +1170,3 @@ def _split_compound_word(compound_word):
 
     return '', compound_word
 
-
-# Hot patch to make libvoikko's vocabulary more compatible with voikko-fi 2.4
-for key, val in WORD_CLASSES.items():
-    if 'subst-kaunis' in val:
-        WORD_CLASSES[key] = ['subst-vieras' if x == 'subst-kaunis' else x for x in val]
-    if 'subst-tosi' in val:
-        WORD_CLASSES[key] = ['subst-susi' if x == 'subst-tosi' else x for x in val]
-    if 'verbi-taitaa' in val:
-        WORD_CLASSES[key] = ['verbi-hohtaa-av1' if x == 'verbi-taitaa' else x for x in val]
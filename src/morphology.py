@@ -0,0 +1,252 @@
+"""Morphology backends for src/inflect.py.
+
+A backend provides the paradigm of a lexeme, the inflection classes of the
+lexemes in its dictionary, and morphological analyses of words. Backends
+have the methods
+
+    paradigm(token, classes=None, required_wclass=None) -> dict
+    inflection_classes(token) -> list or None
+    word_classes() -> dict
+    analyze(word) -> list of dicts
+    version() -> str
+
+VoikkoBackend generates the answers with Voikko. TableBackend reads them
+from a file that RecordingBackend has recorded from another backend.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+# libvoikko handles must not be used from several threads at the same
+# time. Each thread gets its own handle, so that Voikko calls, which release
+# the GIL, can run in parallel.
+_thread_local = threading.local()
+
+def get_voikko():
+    """Return the Voikko handle of the current thread."""
+    handle = getattr(_thread_local, 'voikko', None)
+    if handle is None:
+        from voikko import libvoikko
+        handle = libvoikko.Voikko('fi')
+        _thread_local.voikko = handle
+    return handle
+
+
+_voikko_inflect_word_module = None
+_voikko_inflect_word_lock = threading.Lock()
+
+
+def _voikko_inflect_word():
+    # Reading Voikko's word list dominates the import time, so the module is
+    # imported on first use
+    global _voikko_inflect_word_module
+    if _voikko_inflect_word_module is None:
+        with _voikko_inflect_word_lock:
+            if _voikko_inflect_word_module is None:
+                from voikko import inflect_word as voikko_inflect_word
+                _patch_word_classes(voikko_inflect_word.WORD_CLASSES)
+                _voikko_inflect_word_module = voikko_inflect_word
+    return _voikko_inflect_word_module
+
+
+def _patch_word_classes(word_class_table):
+    # Hot patch to make libvoikko's vocabulary more compatible with voikko-fi 2.4
+    for key, val in word_class_table.items():
+        if 'subst-kaunis' in val:
+            word_class_table[key] = ['subst-vieras' if x == 'subst-kaunis' else x for x in val]
+        if 'subst-tosi' in val:
+            word_class_table[key] = ['subst-susi' if x == 'subst-tosi' else x for x in val]
+        if 'verbi-taitaa' in val:
+            word_class_table[key] = ['verbi-hohtaa-av1' if x == 'verbi-taitaa' else x for x in val]
+
+
+def _libvoikko_version():
+    """Return the versions of libvoikko and its dictionaries as a string."""
+    from voikko import libvoikko
+    try:
+        dictionaries = libvoikko.Voikko.listDicts()
+        version = libvoikko.Voikko.getVersion()
+    except OSError:
+        return ''
+    descriptions = sorted(f'{d.language},{d.script},{d.variant},{d.description}'
+                          for d in dictionaries)
+    return ';'.join([version] + descriptions)
+
+
+class VoikkoBackend:
+    """Paradigms from voikko.inflect_word and analyses from libvoikko.
+
+    Only analyze() needs the native libvoikko library and the Finnish
+    dictionary.
+    """
+
+    def paradigm(self, token, classes=None, required_wclass=None):
+        return _voikko_inflect_word().inflect_word(token, classes=classes,
+                                                   required_wclass=required_wclass)
+
+    def inflection_classes(self, token):
+        return self.word_classes().get(token)
+
+    def word_classes(self):
+        return _voikko_inflect_word().WORD_CLASSES
+
+    def analyze(self, word):
+        return get_voikko().analyze(word)
+
+    def version(self):
+        """Return a hash of Voikko's word list, inflection rules and dictionary.
+
+        The dictionary is used for analyzing compound words. It is left out
+        if the native libvoikko library can not be loaded.
+        """
+        voikko_path = Path(importlib.util.find_spec('voikko').submodule_search_locations[0])
+        h = hashlib.sha256()
+        for name in ['inflect_word.py', 'voikkoinfl.py', 'voikkoutils.py',
+                     'sanat.txt', 'subst.aff', 'verb.aff']:
+            h.update((voikko_path / name).read_bytes())
+        h.update(_libvoikko_version().encode('utf-8'))
+        return h.hexdigest()
+
+
+class TableBackend:
+    """Paradigms, inflection classes and analyses read from a file.
+
+    The file is an SQLite database written by RecordingBackend.write(). It
+    is opened read-only and queried on demand, so opening the table is cheap
+    and processes that use the same file share it through the page cache.
+    Lexemes that are not in the file are passed to fallback, if it is given.
+    Otherwise they are treated like words that are missing from Voikko's
+    dictionary: their paradigm is empty and they have no analyses.
+    """
+
+    def __init__(self, path, fallback=None):
+        self.path = Path(path)
+        self.fallback = fallback
+        self._known_classes = None
+        # SQLite connections must not cross threads or forks
+        self._local = threading.local()
+        row = self._db().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        self._version = row[0]
+
+    def paradigm(self, token, classes=None, required_wclass=None):
+        key = json.dumps([token, classes, required_wclass], ensure_ascii=False)
+        row = self._db().execute('SELECT forms FROM paradigms WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            if self.fallback is not None:
+                return self.fallback.paradigm(token, classes, required_wclass)
+            return {}
+        return json.loads(row[0])
+
+    def inflection_classes(self, token):
+        row = self._db().execute('SELECT classes FROM word_classes WHERE token = ?',
+                                 (token,)).fetchone()
+        # A recorded null means that the token was looked up and has no class
+        if row is None:
+            if self.fallback is not None:
+                return self.fallback.inflection_classes(token)
+            return None
+        return json.loads(row[0])
+
+    def word_classes(self):
+        """Return the inflection classes of the lexemes in the file."""
+        if self._known_classes is None:
+            rows = self._db().execute("SELECT token, classes FROM word_classes WHERE classes != 'null'")
+            self._known_classes = {token: json.loads(classes) for token, classes in rows}
+        return self._known_classes
+
+    def analyze(self, word):
+        row = self._db().execute('SELECT analyses FROM analyses WHERE word = ?', (word,)).fetchone()
+        if row is None:
+            if self.fallback is not None:
+                return self.fallback.analyze(word)
+            return []
+        return json.loads(row[0])
+
+    def version(self):
+        """Return a hash of the file, combined with the fallback's version."""
+        if self.fallback is None:
+            return self._version
+        h = hashlib.sha256()
+        h.update(self._version.encode('utf-8'))
+        h.update(self.fallback.version().encode('utf-8'))
+        return h.hexdigest()
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None or self._local.pid != os.getpid():
+            uri = self.path.resolve().as_uri() + '?mode=ro'
+            db = sqlite3.connect(uri, uri=True)
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+
+class RecordingBackend:
+    """Passes calls to another backend and records the answers.
+
+    write() saves the recorded answers in the format read by TableBackend.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.paradigms = {}
+        self.classes = {}
+        self.analyses = {}
+
+    def paradigm(self, token, classes=None, required_wclass=None):
+        forms = self.backend.paradigm(token, classes, required_wclass)
+        key = (token, tuple(classes) if classes is not None else None, required_wclass)
+        self.paradigms[key] = forms
+        return forms
+
+    def inflection_classes(self, token):
+        classes = self.backend.inflection_classes(token)
+        self.classes[token] = classes
+        return classes
+
+    def word_classes(self):
+        return self.backend.word_classes()
+
+    def analyze(self, word):
+        analyses = self.backend.analyze(word)
+        self.analyses[word] = [dict(x) for x in analyses]
+        return analyses
+
+    def version(self):
+        return self.backend.version()
+
+    def write(self, path):
+        """Save the recorded answers in an SQLite database at path."""
+        def dump(x):
+            return json.dumps(x, ensure_ascii=False, sort_keys=True)
+
+        paradigms = sorted((dump([token, list(classes) if classes is not None else None, wclass]),
+                            dump(forms))
+                           for (token, classes, wclass), forms in self.paradigms.items())
+        classes = sorted((token, dump(x)) for token, x in self.classes.items())
+        analyses = sorted((word, dump(x)) for word, x in self.analyses.items())
+        h = hashlib.sha256()
+        for rows in [paradigms, classes, analyses]:
+            h.update(dump(rows).encode('utf-8'))
+
+        tmp_path = str(path) + '.tmp'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        db = sqlite3.connect(tmp_path)
+        try:
+            with db:
+                db.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID')
+                db.execute('CREATE TABLE paradigms (key TEXT PRIMARY KEY, forms TEXT) WITHOUT ROWID')
+                db.execute('CREATE TABLE word_classes (token TEXT PRIMARY KEY, classes TEXT) WITHOUT ROWID')
+                db.execute('CREATE TABLE analyses (word TEXT PRIMARY KEY, analyses TEXT) WITHOUT ROWID')
+                db.execute("INSERT INTO meta VALUES ('version', ?)", (h.hexdigest(),))
+                db.executemany('INSERT INTO paradigms VALUES (?, ?)', paradigms)
+                db.executemany('INSERT INTO word_classes VALUES (?, ?)', classes)
+                db.executemany('INSERT INTO analyses VALUES (?, ?)', analyses)
+        finally:
+            db.close()
+        os.replace(tmp_path, path)
@@ -1,44 +1,340 @@
+import hashlib
+import logging
+import marshal
+import multiprocessing
+import multiprocessing.util
+import os
 import random
+import sys
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from .inflect import conjugate_verb, inflect_nominal, inflect_pronoun
+from . import inflect
+from .features import FeatureBundle
+from .inflect import (close_persistent_cache, inflect_many, load_compound_splits,
+                      open_persistent_cache, set_backend)
+from .morphology import TableBackend, VoikkoBackend
+from .sampling import AliasTable
+from .vocabfile import (attach_compiled, open_compiled, pack_words, read_text,
+                        share_compiled, truncate)
+
+logger = logging.getLogger(__name__)
 
 punctuation = '.,:;!?'
 
 class Vocabulary:
-    def __init__(self):
-        self.vocabulary = self.load_vocabulary()
+    def __init__(self, vocab_path='data/vocab', prefetch=0, compact=False,
+                 top_n=None, min_freq=None, max_bytes=None):
+        """Weighted random words by word class.
+
+        Word classes are read from vocab_path when they are first used, or
+        up front by calling preload() or load_vocabulary(). A compiled
+        <word_class>.bin file (see tools/compile_vocabulary.py) is
+        memory-mapped in place of the text file if it is at least as new as
+        <word_class>.txt.
+
+        By default, random_word() draws one word at a time. If prefetch is
+        positive, it draws words prefetch at a time and serves single draws
+        from a per-class buffer. The buffered words were drawn before any
+        later random.seed() call, so call clear_prefetch() after reseeding
+        to reproduce the words of an earlier run.
+
+        If compact is True, words parsed from text files are stored in a
+        single UTF-8 buffer with an offset array and the weights in an
+        array('d') instead of lists of str and float objects. Only the
+        sampled words are decoded into str. Compiled files are always
+        stored this way.
+
+        top_n, min_freq and max_bytes trade rare words for smaller tables:
+        each word class keeps at most top_n of its most frequent words,
+        only the words with weight at least min_freq, and only as many
+        words as fit in max_bytes (see vocabfile.truncate). The kept words
+        are sampled in proportion to their weights.
+
+        Call watch() to reload word classes automatically when their files
+        change.
+        """
+        self.vocab_path = Path(vocab_path)
+        self.compact = compact
+        self.prefetch = prefetch
+        self.truncation = {'top_n': top_n, 'min_freq': min_freq, 'max_bytes': max_bytes}
+        # word class -> (words, weights, sampler, prefetch buffer). The
+        # tuple is replaced as a whole when a word class is reloaded.
+        self.vocabulary = {}
+        self.sources = {}
+        self.shared_memory = {}
+        self.attached_memory = {}
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    def load_compound_splits(self):
+        """Load the precomputed compound word splits in vocab_path, if any.
+
+        See tools/precompute_compound_splits.py.
+        """
+        splits_file = self.vocab_path / 'compound_splits.tsv'
+        if splits_file.exists():
+            load_compound_splits(splits_file)
+
+    def load_paradigm_table(self):
+        """Inflect with the recorded paradigms in vocab_path, if any.
+
+        Voikko is used only for the words that are missing from the table.
+        See tools/record_paradigms.py.
+        """
+        table_file = self.vocab_path / 'paradigms.sqlite3'
+        if table_file.exists():
+            set_backend(TableBackend(table_file, fallback=VoikkoBackend()))
 
     def load_vocabulary(self):
-        vocab = {}
-        vocab_path = Path('data/vocab')
-        for f in vocab_path.glob('*.txt'):
-            words = []
-            weights = []
-            for line in f.open('r', encoding='utf-8'):
-                line = line.strip()
-                if ' ' in line:
-                    freq, word = line.split(' ', 1)
-                    freq = float(freq)
-                else:
-                    word = line
-                    freq = 1.0
-                words.append(word)
-                weights.append(freq)
-            vocab[f.stem] = (words, weights)
-        return vocab
+        """Load all word classes found in vocab_path."""
+        word_classes = {f.stem for f in self.vocab_path.glob('*.txt')}
+        word_classes.update(f.stem for f in self.vocab_path.glob('*.bin'))
+        for word_class in sorted(word_classes):
+            self.load_word_class(word_class)
+
+    def preload(self, word_classes):
+        """Load the given word classes unless they have already been loaded."""
+        for word_class in word_classes:
+            if word_class not in self.vocabulary:
+                self.load_word_class(word_class)
+
+    def load_word_class(self, word_class):
+        source = self._source_file(word_class)
+        signature = _file_signature(source)
+        truncated = any(x is not None for x in self.truncation.values())
+        if source is not None and source.suffix == '.bin' and not truncated:
+            words, weights, sampler = open_compiled(source)
+        else:
+            if source is None:
+                words, weights = [], []
+            elif source.suffix == '.bin':
+                words, weights, _ = open_compiled(source)
+            else:
+                words, weights = read_text(source, compact=self.compact and not truncated)
+
+            if truncated:
+                words, weights = truncate(list(words), list(weights), **self.truncation)
+                if self.compact:
+                    words = pack_words(words)
+                    weights = array('d', weights)
+            sampler = AliasTable(weights)
+
+        self.vocabulary[word_class] = (words, weights, sampler, [])
+        self.sources[word_class] = signature
+
+    def reload_changed(self):
+        """Reload the word classes whose files have changed since loading.
+
+        Each changed word class is rebuilt completely before it replaces
+        the old one, so concurrent random_word() calls see either the old
+        or the new words. Returns the reloaded word classes.
+        """
+        reloaded = []
+        for word_class, signature in list(self.sources.items()):
+            if word_class in self.attached_memory:
+                continue
+            if _file_signature(self._source_file(word_class)) != signature:
+                self.load_word_class(word_class)
+                reloaded.append(word_class)
+        return reloaded
+
+    def watch(self, interval=2.0):
+        """Start a background thread that calls reload_changed() every interval seconds."""
+        if self._watcher is not None:
+            return
+
+        def poll():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.reload_changed()
+                except Exception:
+                    # Keep the old words and try again on the next round
+                    logger.exception('Failed to reload vocabulary')
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(target=poll, name='vocabulary-watcher', daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        if self._watcher is not None:
+            self._stop_watching.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def share(self, word_classes=None):
+        """Copy word classes to shared memory for worker processes.
+
+        Loads the word classes if needed (by default the already loaded
+        ones) and returns a picklable description of the shared segments.
+        Pass it to Vocabulary.attach() in the workers. Call unlink_shared()
+        in this process when the workers are done.
+        """
+        if word_classes is None:
+            word_classes = list(self.vocabulary)
+        self.preload(word_classes)
+
+        shared = {}
+        for word_class in word_classes:
+            if word_class not in self.shared_memory:
+                words, weights, sampler, _ = self.vocabulary[word_class]
+                self.shared_memory[word_class] = share_compiled(words, weights, sampler)
+            shared[word_class] = self.shared_memory[word_class].name
+        return {'vocab_path': str(self.vocab_path), 'compact': self.compact, 'segments': shared}
+
+    @classmethod
+    def attach(cls, shared, prefetch=0):
+        """Create a Vocabulary that reads the word classes in shared memory.
+
+        shared is the value returned by share() in the parent process. The
+        words and the sampling tables are not copied or parsed. Other word
+        classes are loaded from vocab_path as usual. Call detach() to
+        release the segments.
+        """
+        vocabulary = cls(shared['vocab_path'], prefetch=prefetch, compact=shared['compact'])
+        for word_class, name in shared['segments'].items():
+            shm, (words, weights, sampler) = attach_compiled(name)
+            vocabulary.vocabulary[word_class] = (words, weights, sampler, [])
+            vocabulary.attached_memory[word_class] = shm
+        return vocabulary
+
+    def detach(self):
+        """Release the shared memory segments attached by attach()."""
+        for word_class in self.attached_memory:
+            self.vocabulary.pop(word_class, None)
+        for shm in self.attached_memory.values():
+            shm.close()
+        self.attached_memory = {}
+
+    def unlink_shared(self):
+        """Destroy the shared memory segments created by share()."""
+        for shm in self.shared_memory.values():
+            shm.close()
+            shm.unlink()
+        self.shared_memory = {}
 
     def random_word(self, word_class):
-        if word_class in self.vocabulary:
-            words, weights = self.vocabulary[word_class]
-            return random.choices(words, weights=weights)[0]
-        else:
+        words, _, sampler, buffer = self._word_class_table(word_class)
+        if not words:
             return ''
+        elif self.prefetch <= 0:
+            return words[sampler.draw()]
+
+        while True:
+            try:
+                return buffer.pop()
+            except IndexError:
+                buffer.extend([words[i] for i in sampler.sample(self.prefetch)])
+
+    def clear_prefetch(self):
+        """Discard the words that random_word() has drawn in advance."""
+        for _, _, _, buffer in self.vocabulary.values():
+            buffer.clear()
+
+    def sample(self, word_class, k):
+        """Return a list of k random words of the given word class.
+
+        Returns an empty list if the word class is unknown or has no words.
+        """
+        words, _, sampler, _ = self._word_class_table(word_class)
+        if words:
+            return [words[i] for i in sampler.sample(k)]
+        else:
+            return []
+
+    def _word_class_table(self, word_class):
+        table = self.vocabulary.get(word_class)
+        if table is None:
+            self.load_word_class(word_class)
+            table = self.vocabulary[word_class]
+        return table
+
+    def _source_file(self, word_class):
+        text_file = self.vocab_path / (word_class + '.txt')
+        compiled_file = self.vocab_path / (word_class + '.bin')
+        if compiled_file.exists() and (not text_file.exists() or
+                                       compiled_file.stat().st_mtime >= text_file.stat().st_mtime):
+            return compiled_file
+        elif text_file.exists():
+            return text_file
+        else:
+            return None
+
+
+def _file_signature(path):
+    if path is None:
+        return None
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (str(path), st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+# Opcodes of the compiled grammar program
+OP_RULE = 0    # expand the rule with id arg
+OP_WORD = 1    # emit the fixed lexeme arg
+OP_CHOICE = 2  # emit a lexeme drawn from the tuple arg
+OP_SAMPLE = 3  # emit a word drawn from the vocabulary
+
+# Thread pools of generate_many() by number of threads. The pools are kept
+# alive between calls, so that their threads keep their Voikko handles.
+_thread_pools = {}
+_thread_pools_lock = threading.Lock()
+# The threads of a pool do not exist in a forked child
+os.register_at_fork(after_in_child=_thread_pools.clear)
+
+
+def _thread_pool(threads):
+    with _thread_pools_lock:
+        executor = _thread_pools.get(threads)
+        if executor is None:
+            executor = ThreadPoolExecutor(threads)
+            _thread_pools[threads] = executor
+        return executor
 
 
 class Grammar:
-    def __init__(self, rules):
+    def __init__(self, rules, max_depth=40, max_tokens=100):
+        """A context-free grammar that generates inflected sentences.
+
+        rules maps rule names to lists of alternatives. Each alternative is
+        a list of Rules, Terminals and Optionals, or a Weighted list. The
+        alternatives are chosen in proportion to their weights, which are 1
+        for plain lists.
+
+        The rules are compiled into a flat program when the grammar is
+        created (see _compile()), and generation runs the program instead
+        of walking the rule objects.
+
+        max_depth and max_tokens bound the size of a generated sentence.
+        Once rules are nested max_depth deep or the sentence has max_tokens
+        terminals, the remaining rules are expanded with their shortest
+        alternative and optional parts are left out. None means no limit.
+        """
         self.validate_rules(rules)
         self.rules = rules
+        self.max_depth = max_depth
+        self.max_tokens = max_tokens
+        self.rule_ids, self.program, self.samplers = self._compile(rules)
+        self.shortest = self._shortest_alternatives(rules)
+        self.generated_rules = None
+        self.code_cache_dir = None
+
+    def __getstate__(self):
+        # Functions created by exec can not be pickled. They are recreated
+        # (or loaded from the code cache) when the grammar is unpickled.
+        state = self.__dict__.copy()
+        state['generated_rules'] = None
+        state['use_generated_code'] = self.generated_rules is not None
+        return state
+
+    def __setstate__(self, state):
+        use_generated_code = state.pop('use_generated_code', False)
+        self.__dict__.update(state)
+        if use_generated_code:
+            self.compile_python(self.code_cache_dir)
 
     def get(self, key):
         return self.rules.get(key)
@@ -47,10 +343,18 @@ class Grammar:
         known_rule_names = set(rules.keys())
         known_word_classes = ['teonsana', 'nimisana', 'laatusana', 'lukusana',
                               'asemosana', 'seikkasana', 'sidesana', 'välimerkki']
-        for _, rule_alternatives in rules.items():
-            for rule_list in rule_alternatives:
+        for name, rule_alternatives in rules.items():
+            if not rule_alternatives:
+                raise ValueError(f'Rule {name} has no alternatives')
+
+            for rule_list, weight in _weighted(rule_alternatives):
+                if weight <= 0:
+                    raise ValueError(f'Alternative of rule {name} has non-positive weight: {weight}')
+
                 for rule in rule_list:
                     if isinstance(rule, Optional):
+                        if not 0 <= rule.p <= 1:
+                            raise ValueError(f'Probability out of range: {rule.p}')
                         rule = rule.rule
 
                     if isinstance(rule, Rule):
@@ -61,15 +365,64 @@ class Grammar:
                         if rule.word_class not in known_word_classes:
                             raise ValueError(f'Unknown word class: {rule.word_class}')
 
+    def sampled_word_classes(self):
+        """Return the word classes that the Terminals draw from a Vocabulary.
+
+        Terminals with a fixed lexeme or a list of lexemes do not need the
+        vocabulary and are not included.
+        """
+        word_classes = set()
+        for rule_alternatives in self.rules.values():
+            for rule_list, _ in _weighted(rule_alternatives):
+                for rule in rule_list:
+                    if isinstance(rule, Optional):
+                        rule = rule.rule
+
+                    if isinstance(rule, Terminal) and rule.lexeme is None:
+                        word_classes.add(rule.word_class)
+        return word_classes
+
     def generate(self, rule_name, vocabulary):
-        attributes = {
-            'case': 'Nom',
-            'number': random.choice(['Sing', 'Plur']),
-            'person': '3',
-            'tense': random.choice(['Pres', 'Past']),
-            'mood': 'Ind',
-        }
-        tokens = self._generate_recursive(rule_name, vocabulary, attributes)
+        return self.generate_many(rule_name, vocabulary, 1)[0]
+
+    def generate_many(self, rule_name, vocabulary, n, threads=None):
+        """Generate n texts.
+
+        The words of all texts are inflected in one batch, so a lexeme that
+        occurs several times is looked up only once.
+
+        If threads is given, the inflection is split into chunks that run
+        in a pool of that many threads. The pool is reused by later calls.
+        Each thread keeps its own Voikko handle, and Voikko analysis
+        releases the GIL, so that part of the work runs in parallel. The
+        rest of the inflection is pure Python and does not. The sentence structures and the words are always
+        drawn in the calling thread, so the output for a fixed random seed
+        does not depend on the number of threads.
+        """
+        sentences = []
+        for _ in range(n):
+            attributes = FeatureBundle.of(
+                case='Nom',
+                number=random.choice(['Sing', 'Plur']),
+                person='3',
+                tense=random.choice(['Pres', 'Past']),
+                mood='Ind',
+            )
+            sentences.append(self._expand(rule_name, vocabulary, attributes))
+
+        if threads:
+            chunk_size = max(1, len(sentences) // (4 * threads))
+            chunks = [sentences[i:i + chunk_size] for i in range(0, len(sentences), chunk_size)]
+            texts = _thread_pool(threads).map(self._inflect_and_join, chunks)
+            return [text for chunk in texts for text in chunk]
+        else:
+            return self._inflect_and_join(sentences)
+
+    def _inflect_and_join(self, sentences):
+        inflected = iter(self._inflect([t for terminals in sentences for t in terminals]))
+        return [self._join_tokens([next(inflected) for _ in terminals]) for terminals in sentences]
+
+    def _join_tokens(self, tokens):
         if tokens and tokens[-1] not in '.?!':
             tokens.append('.')
         text = ''
@@ -84,54 +437,284 @@ class Grammar:
             text = text[0].upper() + text[1:]
         return text
 
-    def _generate_recursive(self, rule_name, vocabulary, attributes):
-        generated = []
-        options = self.rules.get(rule_name)
-        for rule in random.choice(options):
+    def _compile(self, rules):
+        """Compile rules into a list of alternatives indexed by rule id.
+
+        Returns a dict from rule names to ids, the program and the
+        samplers. The entry of a rule in the program is a tuple of
+        alternatives, and each alternative is a tuple of (opcode, arg,
+        word_class, attributes, optional) instructions. attributes is the
+        FeatureBundle of the attributes set by the rule object, or None if
+        it does not set any. optional is None for rules that are always
+        expanded. For Optionals, it is an AliasTable that draws 1 with
+        probability p. The entry of a rule in samplers is an AliasTable
+        over the weights of its alternatives.
+        """
+        rule_ids = {name: i for i, name in enumerate(rules)}
+
+        def overrides(rule):
+            return FeatureBundle.of(rule.attributes) if rule.attributes else None
+
+        def instruction(rule):
+            p = None
             if isinstance(rule, Optional):
-                if random.random() < rule.p:
-                    rule = rule.rule
-                else:
-                    continue
+                p = AliasTable([1 - rule.p, rule.p])
+                rule = rule.rule
 
-            attributes2 = {**attributes, **rule.attributes}
-            
             if isinstance(rule, Rule):
-                generated.extend(self._generate_recursive(rule.name, vocabulary, attributes2))
+                return (OP_RULE, rule_ids[rule.name], None, overrides(rule), p)
             elif isinstance(rule, Terminal):
-                inflected = self._inflect(rule.get_lexeme(vocabulary), rule.word_class, attributes2)
-                generated.append(inflected)
+                attributes = overrides(rule)
+                if isinstance(rule.lexeme, str):
+                    return (OP_WORD, rule.lexeme, rule.word_class, attributes, p)
+                elif rule.lexeme is not None:
+                    return (OP_CHOICE, tuple(rule.lexeme), rule.word_class, attributes, p)
+                else:
+                    return (OP_SAMPLE, None, rule.word_class, attributes, p)
             else:
                 raise ValueError(f'Unknown rule: {rule}')
 
+        program = []
+        samplers = []
+        for rule_alternatives in rules.values():
+            alternatives, weights = zip(*_weighted(rule_alternatives))
+            program.append(tuple(tuple(instruction(rule) for rule in rule_list)
+                                 for rule_list in alternatives))
+            samplers.append(AliasTable(weights))
+        return rule_ids, program, samplers
+
+    def _shortest_alternatives(self, rules):
+        """Return the alternative with the shortest expansion for each rule id.
+
+        Optionals are left out of the expansion. The chosen alternatives
+        never lead back to the same rule, so expanding only them always
+        terminates.
+        """
+        lengths = [None] * len(self.program)
+
+        def length(instruction):
+            op, arg, _, _, p = instruction
+            if p is not None:
+                return 0
+            elif op == OP_RULE:
+                return lengths[arg]
+            else:
+                return 1
+
+        shortest = [None] * len(self.program)
+        changed = True
+        while changed:
+            changed = False
+            for rule_id, alternatives in enumerate(self.program):
+                for alternative in alternatives:
+                    parts = [length(x) for x in alternative]
+                    if None in parts:
+                        continue
+                    # Only a strictly shorter alternative replaces the
+                    # current one, so that the choices can not form a cycle
+                    if lengths[rule_id] is None or sum(parts) < lengths[rule_id]:
+                        lengths[rule_id] = sum(parts)
+                        shortest[rule_id] = alternative
+                        changed = True
+
+        for name, rule_id in self.rule_ids.items():
+            if shortest[rule_id] is None:
+                raise ValueError(f'Rule {name} never terminates')
+        return shortest
+
+    def _expand(self, rule_name, vocabulary, attributes):
+        """Expand a rule into a list of (lexeme, word_class, attributes) terminals.
+
+        The attributes of the terminals are FeatureBundles.
+        """
+        generated = []
+        attributes = FeatureBundle.of(attributes)
+        if self.generated_rules is not None:
+            self.generated_rules[self.rule_ids[rule_name]](vocabulary, attributes, generated, 1)
+        else:
+            self._run(self.rule_ids[rule_name], vocabulary, attributes, generated)
         return generated
 
-    def _inflect(self, lexeme, word_class, attributes):
-        if word_class == 'teonsana':
-            return conjugate_verb(
-                lexeme,
-                tense=attributes.get('tense'),
-                person=attributes.get('person'),
-                number=attributes.get('number'),
-                mood=attributes.get('mood'),
-                infform=attributes.get('infform'),
-                partform=attributes.get('partform'),
-                connegative=attributes.get('connegative'))
-        elif word_class in ['laatusana', 'lukusana', 'nimisana']:
-            return inflect_nominal(
-                lexeme,
-                case=attributes.get('case'),
-                number=attributes.get('number'),
-                degree=attributes.get('degree'),
-                person_psor=attributes.get('person_psor'),
-                number_psor=attributes.get('number_psor'))
-        elif word_class == 'asemosana':
-            return inflect_pronoun(
-                lexeme,
-                case=attributes.get('case'),
-                number=attributes.get('number'))
-        else:
-            return lexeme
+    def _run(self, rule_id, vocabulary, attributes, generated):
+        # Runs the program with an explicit stack of (remaining
+        # instructions, attributes, depth, bounded) frames. The random draws
+        # happen in the same order as in a recursive expansion of the rules.
+        choice = random.choice
+        append = generated.append
+        program = self.program
+        samplers = self.samplers
+        shortest = self.shortest
+        max_depth = self.max_depth if self.max_depth is not None else float('inf')
+        max_tokens = self.max_tokens if self.max_tokens is not None else float('inf')
+
+        stack = [(iter(program[rule_id][samplers[rule_id].draw()]), attributes, 1, False)]
+        while stack:
+            instructions, attributes, depth, bounded = stack[-1]
+            for op, arg, word_class, override, optional in instructions:
+                if optional is not None and (bounded or not optional.draw()):
+                    continue
+
+                attributes2 = attributes.merge(override) if override else attributes
+                if op == OP_RULE:
+                    if bounded or depth >= max_depth or len(generated) >= max_tokens:
+                        stack.append((iter(shortest[arg]), attributes2, depth + 1, True))
+                    else:
+                        alternative = program[arg][samplers[arg].draw()]
+                        stack.append((iter(alternative), attributes2, depth + 1, False))
+                    break
+                elif op == OP_WORD:
+                    append((arg, word_class, attributes2))
+                elif op == OP_CHOICE:
+                    append((choice(arg), word_class, attributes2))
+                else:
+                    append((vocabulary.random_word(word_class), word_class, attributes2))
+            else:
+                stack.pop()
+
+    def python_source(self):
+        """Return the grammar as the source code of a Python module.
+
+        See compile_python().
+        """
+        return self._python_module()[0]
+
+    def compile_python(self, cache_dir=None):
+        """Generate the sentence structures with Python code generated from the rules.
+
+        The rules are translated into a Python module with two functions
+        per rule: rule_<id> draws an alternative and expands it, and
+        short_<id> expands the shortest alternative once a budget is
+        exhausted. The alternatives are inlined as branches, Optionals as
+        inline probability checks, and the sampling tables, lexemes and
+        attribute overrides as constants. The generated code draws the
+        same random numbers as the program interpreter, so the output for
+        a fixed seed does not change.
+
+        If cache_dir is given, the compiled code is stored there in a file
+        named after a hash of the generated source, and later grammars
+        with the same rules and budgets load it instead of compiling.
+
+        The generated functions call each other recursively, so max_depth
+        must be set and well below the recursion limit. Set max_depth and
+        max_tokens before calling this.
+        """
+        if self.max_depth is None or self.max_depth + len(self.program) + 100 > sys.getrecursionlimit():
+            raise ValueError('Generated code needs a max_depth below the recursion limit')
+
+        source, constants = self._python_module()
+        digest = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        code = None
+        if cache_dir is not None:
+            cache_file = Path(cache_dir) / f'grammar-{digest[:32]}.{sys.implementation.cache_tag}.bin'
+            try:
+                code = marshal.loads(cache_file.read_bytes())
+            except (OSError, EOFError, ValueError, TypeError):
+                code = None
+
+        if code is None:
+            code = compile(source, f'<grammar {digest[:12]}>', 'exec')
+            if cache_dir is not None:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_name(cache_file.name + f'.{os.getpid()}.tmp')
+                tmp_file.write_bytes(marshal.dumps(code))
+                os.replace(tmp_file, cache_file)
+
+        namespace = {'rand': random.random, 'choice': random.choice, **constants}
+        exec(code, namespace)
+        self.generated_rules = [namespace[f'rule_{i}'] for i in range(len(self.program))]
+        self.code_cache_dir = cache_dir
+
+    def _python_module(self):
+        """Return the generated source and the constants it refers to.
+
+        The constants are the attribute override bundles, which are passed
+        to the module as globals named o_<n>.
+        """
+        constants = {}
+        bundle_names = {}
+
+        def bundle_name(bundle):
+            if bundle not in bundle_names:
+                bundle_names[bundle] = f'o_{len(bundle_names)}'
+                constants[bundle_names[bundle]] = bundle
+            return bundle_names[bundle]
+
+        def draw(table, indent):
+            # Same arithmetic as AliasTable.draw(). Columns with probability
+            # 1 never use their alias, so uniform tables need no lookup.
+            if len(table) == 1:
+                return [f'{indent}rand()']
+            elif all(p == 1.0 for p in table.prob):
+                return [f'{indent}i = int(rand() * {len(table)})']
+            else:
+                return [f'{indent}r = rand() * {len(table)}',
+                        f'{indent}i = int(r)',
+                        f'{indent}if r - i >= {tuple(table.prob)!r}[i]:',
+                        f'{indent}    i = {tuple(table.alias)!r}[i]']
+
+        def alternative_lines(alternative, indent, bounded):
+            lines = []
+            for op, arg, word_class, override, optional in alternative:
+                if optional is not None:
+                    if bounded:
+                        continue
+                    lines.extend(draw(optional, indent))
+                    lines.append(f'{indent}if i:')
+                    inner = indent + '    '
+                else:
+                    inner = indent
+
+                if override is None:
+                    attributes = 'attributes'
+                else:
+                    attributes = f'attributes.merge({bundle_name(override)})'
+
+                if op == OP_RULE:
+                    if bounded:
+                        lines.append(f'{inner}short_{arg}(vocabulary, {attributes}, generated)')
+                    else:
+                        condition = f'depth >= {self.max_depth}'
+                        if self.max_tokens is not None:
+                            condition += f' or len(generated) >= {self.max_tokens}'
+                        lines.extend([
+                            f'{inner}if {condition}:',
+                            f'{inner}    short_{arg}(vocabulary, {attributes}, generated)',
+                            f'{inner}else:',
+                            f'{inner}    rule_{arg}(vocabulary, {attributes}, generated, depth + 1)',
+                        ])
+                elif op == OP_WORD:
+                    lines.append(f'{inner}generated.append(({arg!r}, {word_class!r}, {attributes}))')
+                elif op == OP_CHOICE:
+                    lines.append(f'{inner}generated.append((choice({arg!r}), {word_class!r}, {attributes}))')
+                else:
+                    lines.append(f'{inner}generated.append((vocabulary.random_word({word_class!r}), '
+                                 f'{word_class!r}, {attributes}))')
+            return lines or [f'{indent}pass']
+
+        names = {rule_id: name for name, rule_id in self.rule_ids.items()}
+        lines = ['# Generated by Grammar.python_source()']
+        for rule_id, alternatives in enumerate(self.program):
+            lines.extend(['', '',
+                          f'def rule_{rule_id}(vocabulary, attributes, generated, depth):',
+                          f'    # {names[rule_id]}'])
+            lines.extend(draw(self.samplers[rule_id], '    '))
+            if len(alternatives) == 1:
+                lines.extend(alternative_lines(alternatives[0], '    ', False))
+            else:
+                for i, alternative in enumerate(alternatives):
+                    keyword = 'if' if i == 0 else 'elif' if i < len(alternatives) - 1 else 'else'
+                    condition = f' i == {i}' if keyword != 'else' else ''
+                    lines.append(f'    {keyword}{condition}:')
+                    lines.extend(alternative_lines(alternative, '        ', False))
+
+            lines.extend(['', '',
+                          f'def short_{rule_id}(vocabulary, attributes, generated):'])
+            lines.extend(alternative_lines(self.shortest[rule_id], '    ', True))
+
+        return '\n'.join(lines) + '\n', constants
+
+    def _inflect(self, terminals):
+        return inflect_many(terminals)
 
 
 class Rule:
@@ -166,12 +749,28 @@ class Optional:
         self.p = p
 
 
+class Weighted:
+    """An alternative of a rule that is chosen weight times as often as a plain list."""
+
+    def __init__(self, rules, weight):
+        self.rules = rules
+        self.weight = weight
+
+
+def _weighted(rule_alternatives):
+    """Yield (list of rules, weight) for each alternative of a rule."""
+    for alternative in rule_alternatives:
+        if isinstance(alternative, Weighted):
+            yield alternative.rules, alternative.weight
+        else:
+            yield alternative, 1
+
+
 R = Rule
 grammar = Grammar({
     'SENTENCE': [
         # declarative sentence
-        [R('NP', case='Nom'), R('VP', person='3')],
-        [R('NP', case='Nom'), R('VP', person='3')], # Repeated to make this clause type more common
+        Weighted([R('NP', case='Nom'), R('VP', person='3')], 2),
 
         # passive
         [R('NP', case='Ine'), R('VPass'), Optional(R('AdvP'), 0.2)],
@@ -282,7 +881,75 @@ grammar = Grammar({
         [Terminal('seikkasana')]
     ]
 })
-vocabulary = Vocabulary()
 
-for _ in range(10):
-    print(grammar.generate('SENTENCE', vocabulary))
+
+_worker_state = {}
+
+def _init_worker(grammar, shared, inflection_cache_path=None):
+    # Forked workers would otherwise inherit the random state of the parent
+    random.seed()
+    _worker_state['grammar'] = grammar
+    # Workers are seeded randomly, so prefetching does not change results
+    _worker_state['vocabulary'] = Vocabulary.attach(shared, prefetch=256)
+    # Forked workers inherit the splits and the table from the parent
+    if not inflect.compound_splits:
+        _worker_state['vocabulary'].load_compound_splits()
+    if not isinstance(inflect.backend, TableBackend):
+        _worker_state['vocabulary'].load_paradigm_table()
+    if inflection_cache_path is not None:
+        open_persistent_cache(inflection_cache_path)
+    # Pool workers exit without running atexit handlers
+    multiprocessing.util.Finalize(None, _exit_worker, exitpriority=10)
+
+
+def _exit_worker():
+    close_persistent_cache()
+    _worker_state.pop('vocabulary').detach()
+
+
+def _generate_in_worker(rule_name):
+    return _worker_state['grammar'].generate(rule_name, _worker_state['vocabulary'])
+
+
+def generate_parallel(grammar, rule_name, vocabulary, n, processes=None):
+    """Generate n texts in a pool of worker processes.
+
+    The word classes used by the grammar are loaded once in this process
+    and shared with the workers through shared memory. The compound word
+    splits and the paradigm table are loaded here too, so that forked
+    workers inherit them instead of reading them again. If a persistent
+    inflection cache is open in this process, the workers use the same
+    file.
+    """
+    shared = vocabulary.share(grammar.sampled_word_classes())
+    if not inflect.compound_splits:
+        vocabulary.load_compound_splits()
+    if not isinstance(inflect.backend, TableBackend):
+        vocabulary.load_paradigm_table()
+    cache = inflect.persistent_cache
+    cache_path = cache.path if cache is not None else None
+    try:
+        with multiprocessing.Pool(processes, initializer=_init_worker,
+                                  initargs=(grammar, shared, cache_path)) as pool:
+            texts = pool.map(_generate_in_worker, [rule_name] * n, chunksize=max(1, n // 100))
+            # Let the workers exit normally so that they flush their caches
+            pool.close()
+            pool.join()
+        return texts
+    finally:
+        vocabulary.unlink_shared()
+
+
+def main():
+    vocabulary = Vocabulary()
+    vocabulary.preload(grammar.sampled_word_classes())
+    vocabulary.load_compound_splits()
+    vocabulary.load_paradigm_table()
+    grammar.compile_python()
+
+    for _ in range(10):
+        print(grammar.generate('SENTENCE', vocabulary))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import random
+from array import array
+
+
+class AliasTable:
+    """Weighted sampler with O(1) draws (Walker's alias method).
+
+    The table is built once in O(n) time using Vose's algorithm. Each draw
+    picks a uniformly random column and then either the column itself or its
+    alias. Raises ValueError if the weights are not empty and do not have a
+    positive sum, like random.choices().
+    """
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        self.prob = array('d', [1.0]) * n
+        self.alias = array('I', range(n))
+
+        if n == 0:
+            return
+        if not total > 0:
+            raise ValueError('Total of weights must be greater than zero')
+
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large[-1]
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            if scaled[l] < 1.0:
+                small.append(large.pop())
+
+        # Whatever is left over has probability 1 up to rounding errors
+        for i in large + small:
+            self.prob[i] = 1.0
+
+    @classmethod
+    def from_arrays(cls, prob, alias):
+        """Wrap an existing probability and alias table without rebuilding it.
+
+        prob and alias can be any indexable sequences, such as arrays or
+        memoryviews of a memory-mapped file.
+        """
+        table = cls.__new__(cls)
+        table.prob = prob
+        table.alias = alias
+        return table
+
+    def __len__(self):
+        return len(self.prob)
+
+    def draw(self, rng=random):
+        """Return a random index distributed according to the weights."""
+        r = rng.random() * len(self.prob)
+        i = int(r)
+        if r - i < self.prob[i]:
+            return i
+        else:
+            return self.alias[i]
+
+    def sample(self, k, rng=random):
+        """Return a list of k random indices."""
+        prob = self.prob
+        alias = self.alias
+        n = len(prob)
+        rand = rng.random
+        indices = []
+        append = indices.append
+        for _ in range(k):
+            r = rand() * n
+            i = int(r)
+            append(i if r - i < prob[i] else alias[i])
+        return indices
@@ -0,0 +1,241 @@
+"""Vocabulary file formats.
+
+A word class is stored either as a text file, one word per line optionally
+preceded by its frequency, or as a compiled binary file. The binary file
+contains, in this order:
+
+    header   magic, byte order mark, word count, blob size
+    offsets  uint32[n + 1], start of each word in the blob
+    weights  float32[n]
+    prob     float64[n], alias table probabilities
+    alias    uint32[n], alias table indices
+    blob     UTF-8 encoded words concatenated
+
+The arrays are in the native byte order of the machine that compiled the
+file. Compiled files are memory-mapped, so loading them does no parsing and
+the pages are shared between processes through the OS page cache. The same
+layout is used to share a loaded vocabulary with worker processes through
+multiprocessing.shared_memory.
+"""
+import mmap
+import os
+import struct
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from .sampling import AliasTable
+
+MAGIC = b'PUPPUVC1'
+BYTE_ORDER_MARK = 0x01020304
+header_format = '=8sIxxxxQQ'
+header_size = struct.calcsize(header_format)
+# Bytes per word in the compiled layout in addition to the UTF-8 encoded
+# word: offset, weight, alias table probability and alias table index
+record_size = (array('I').itemsize + array('f').itemsize +
+               array('d').itemsize + array('I').itemsize)
+
+
+class PackedWords:
+    """A read-only sequence of words stored in a single UTF-8 buffer.
+
+    Words are decoded only when they are accessed.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('word index out of range')
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], 'utf-8')
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def read_text(path, compact=False):
+    """Read a text vocabulary file and return (words, weights).
+
+    If compact is True, words is returned as a PackedWords and weights as
+    an array('d'). They take a fraction of the memory of the default
+    lists of str and float objects.
+    """
+    if compact:
+        blob = bytearray()
+        offsets = array('I', [0])
+        weights = array('d')
+    else:
+        words = []
+        weights = []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if ' ' in line:
+                freq, word = line.split(' ', 1)
+                freq = float(freq)
+            else:
+                word = line
+                freq = 1.0
+            if compact:
+                blob += word.encode('utf-8')
+                offsets.append(len(blob))
+            else:
+                words.append(word)
+            weights.append(freq)
+
+    if compact:
+        words = PackedWords(bytes(blob), offsets)
+    return words, weights
+
+
+def pack_words(words):
+    """Return the words as a PackedWords."""
+    blob = bytearray()
+    offsets = array('I', [0])
+    for word in words:
+        blob += word.encode('utf-8')
+        offsets.append(len(blob))
+    return PackedWords(bytes(blob), offsets)
+
+
+def truncate(words, weights, *, top_n=None, min_freq=None, max_bytes=None):
+    """Keep only the most frequent words.
+
+    top_n keeps at most that many words, min_freq drops words whose weight
+    is below it, and max_bytes keeps words until their storage size in the
+    compiled layout would exceed the budget. A word takes its UTF-8 length
+    plus record_size bytes for its offset, weight and alias table entry.
+    The kept words are returned in descending order of weight. The weights
+    are not renormalized, so that min_freq can still be applied to the
+    result. The alias table normalizes them when sampling.
+    """
+    order = sorted(range(len(words)), key=weights.__getitem__, reverse=True)
+    if top_n is not None:
+        order = order[:top_n]
+    if min_freq is not None:
+        order = [i for i in order if weights[i] >= min_freq]
+    if max_bytes is not None:
+        size = 0
+        for j, i in enumerate(order):
+            size += len(words[i].encode('utf-8')) + record_size
+            if size > max_bytes:
+                order = order[:j]
+                break
+
+    return [words[i] for i in order], [weights[i] for i in order]
+
+
+def write_compiled(path, words, weights, sampler=None):
+    """Write words and their weights into a compiled binary file.
+
+    The file is written under a temporary name and then renamed, so
+    processes that have the old file memory-mapped keep seeing the old
+    contents.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(pack_compiled(words, weights, sampler))
+    os.replace(tmp_path, path)
+
+
+def pack_compiled(words, weights, sampler=None):
+    """Return words and their weights in the compiled binary format."""
+    if sampler is None:
+        sampler = AliasTable(weights)
+
+    if not isinstance(words, PackedWords):
+        words = pack_words(words)
+
+    parts = [
+        struct.pack(header_format, MAGIC, BYTE_ORDER_MARK, len(words), len(words.blob)),
+        array('I', words.offsets).tobytes(),
+        array('f', weights).tobytes(),
+    ]
+    pos = sum(len(x) for x in parts)
+    parts.append(b'\0' * _padding(pos, 8))
+    parts.append(array('d', sampler.prob).tobytes())
+    parts.append(array('I', sampler.alias).tobytes())
+    parts.append(bytes(words.blob))
+    return b''.join(parts)
+
+
+def open_compiled(path):
+    """Memory-map a compiled binary file.
+
+    Returns (words, weights, sampler) where words is a PackedWords and
+    weights and the sampler tables are views to the mapped file.
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            raise ValueError(f'Empty vocabulary file: {path}')
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    return unpack_compiled(memoryview(mm), path)
+
+
+def share_compiled(words, weights, sampler=None):
+    """Copy words and their weights into a new shared memory segment.
+
+    The caller owns the returned SharedMemory and must unlink() it when the
+    vocabulary is no longer needed.
+    """
+    data = pack_compiled(words, weights, sampler)
+    shm = SharedMemory(create=True, size=max(len(data), 1))
+    shm.buf[:len(data)] = data
+    return shm
+
+
+def attach_compiled(name):
+    """Attach to a shared memory segment created by share_compiled().
+
+    Returns the SharedMemory and (words, weights, sampler) as read-only
+    views to the segment. Nothing is copied.
+    """
+    try:
+        shm = SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the segment with the resource
+        # tracker. Worker processes share the tracker of the parent that
+        # created the segment, so this is harmless for them.
+        shm = SharedMemory(name=name)
+
+    return shm, unpack_compiled(shm.buf.toreadonly(), name)
+
+
+def unpack_compiled(buf, name='<buffer>'):
+    """Split a buffer in the compiled format into (words, weights, sampler)."""
+    magic, bom, n, blob_size = struct.unpack_from(header_format, buf)
+    if magic != MAGIC:
+        raise ValueError(f'Not a compiled vocabulary file: {name}')
+    if bom != BYTE_ORDER_MARK:
+        raise ValueError(f'Vocabulary file was compiled on a machine with different byte order: {name}')
+
+    pos = header_size
+    offsets = buf[pos:pos + 4 * (n + 1)].cast('I')
+    pos += 4 * (n + 1)
+    weights = buf[pos:pos + 4 * n].cast('f')
+    pos += 4 * n
+    pos += _padding(pos, 8)
+    prob = buf[pos:pos + 8 * n].cast('d')
+    pos += 8 * n
+    alias = buf[pos:pos + 4 * n].cast('I')
+    pos += 4 * n
+    blob = buf[pos:pos + blob_size]
+
+    return PackedWords(blob, offsets), weights, AliasTable.from_arrays(prob, alias)
+
+
+def _padding(pos, alignment):
+    return -pos % alignment
@@ -0,0 +1,82 @@
+import time
+from src.cache import LRUCache, PersistentCache
+
+
+def test_lru_cache_counts_hits_misses_and_evictions():
+    cache = LRUCache(maxsize=2)
+    assert cache.get('a', lambda: 1) == 1
+    assert cache.get('b', lambda: None) is None
+    assert cache.get('a', lambda: 2) == 1
+    assert cache.get('b', lambda: 2) is None
+    assert cache.get('c', lambda: 3) == 3
+
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions, info.currsize) == (2, 3, 1, 2)
+    assert 'a' not in cache
+    assert 'b' in cache
+
+
+def test_persistent_cache_is_reloaded(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    cache = PersistentCache(path, 'v1', batch_size=2)
+    assert cache.get('a', lambda: 'A') == 'A'
+    assert cache.get('b', lambda: 'B') == 'B'
+    assert cache.get('c', lambda: 'C') == 'C'
+    cache.flush()
+
+    other = PersistentCache(path, 'v1')
+    assert len(other) == 3
+    assert other.get('a', lambda: 'x') == 'A'
+    info = other.cache_info()
+    assert (info.hits, info.misses) == (1, 0)
+
+
+def test_persistent_cache_reads_evicted_entries_from_database(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    cache = PersistentCache(path, 'v1', batch_size=2, maxsize=2)
+    for key in 'abc':
+        cache.get(key, lambda: key.upper())
+    assert len(cache.memory) == 2
+    assert 'a' not in cache.memory
+    # a and b have been written to the database and c is still pending
+    assert [cache.get(key, lambda: 'x') for key in 'abc'] == ['A', 'B', 'C']
+    info = cache.cache_info()
+    assert (info.hits, info.misses, info.evictions) == (3, 3, 4)
+
+
+def test_persistent_cache_keeps_versions_apart(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    cache = PersistentCache(path, 'v1')
+    cache.get('a', lambda: 'A')
+    cache.flush()
+
+    cache = PersistentCache(path, 'v2')
+    assert 'a' not in cache
+    assert cache.get('a', lambda: 'A2') == 'A2'
+    cache.flush()
+    assert PersistentCache(path, 'v2').get('a', lambda: 'x') == 'A2'
+    assert PersistentCache(path, 'v1').get('a', lambda: 'x') == 'A'
+
+
+def test_persistent_cache_discards_unused_versions(tmp_path, monkeypatch):
+    path = tmp_path / 'cache.sqlite3'
+    cache = PersistentCache(path, 'v1')
+    cache.get('a', lambda: 'A')
+    cache.flush()
+
+    now = time.time()
+    monkeypatch.setattr(time, 'time', lambda: now + 8 * 24 * 3600)
+    PersistentCache(path, 'v2')
+    assert 'a' not in PersistentCache(path, 'v1')
+
+
+def test_persistent_cache_concurrent_writers(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    first = PersistentCache(path, 'v1')
+    second = PersistentCache(path, 'v1')
+    first.get('a', lambda: 'A')
+    second.get('a', lambda: 'A')
+    second.get('b', lambda: 'B')
+    first.flush()
+    second.flush()
+    assert len(PersistentCache(path, 'v1')) == 2
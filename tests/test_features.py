@@ -0,0 +1,35 @@
+import pickle
+import pytest
+from src.features import FeatureBundle
+
+
+def test_bundles_are_interned():
+    a = FeatureBundle.of({'case': 'Ine', 'number': 'Plur'})
+    b = FeatureBundle.of(number='Plur', case='Ine')
+    assert a is b
+    assert a == {'case': 'Ine', 'number': 'Plur'}
+    assert FeatureBundle.of(a) is a
+
+
+def test_merge():
+    parent = FeatureBundle.of(case='Nom', number='Sing', person='3')
+    override = FeatureBundle.of(case='Gen')
+    merged = parent.merge(override)
+    assert merged == {'case': 'Gen', 'number': 'Sing', 'person': '3'}
+    assert merged is FeatureBundle.of(case='Gen', number='Sing', person='3')
+    assert parent.merge(override) is merged
+    assert parent == {'case': 'Nom', 'number': 'Sing', 'person': '3'}
+
+
+def test_bundles_are_immutable():
+    bundle = FeatureBundle.of(case='Nom')
+    with pytest.raises(TypeError):
+        bundle['case'] = 'Gen'
+    with pytest.raises(TypeError):
+        bundle.update(number='Plur')
+    assert bundle == {'case': 'Nom'}
+
+
+def test_unpickled_bundles_are_interned():
+    bundle = FeatureBundle.of(case='Ela', number='Plur')
+    assert pickle.loads(pickle.dumps(bundle)) is bundle
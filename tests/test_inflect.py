@@ -1,5 +1,14 @@
+import itertools
+import subprocess
+import sys
 import pytest
-from src.inflect import conjugate_verb, inflect_nominal, inflect_pronoun
+from src import inflect
+from src.inflect import (_conjugate_verb_forms, _has_two_syllables_inaccurate, _inflect_pronoun,
+                         close_persistent_cache, conjugate_verb, inflect_many,
+                         inflect_nominal, inflect_pronoun, lexeme_profile, load_compound_splits,
+                         nominal_paradigm, nominal_paradigm_features, open_persistent_cache,
+                         paradigm_cache, profile_cache, verb_paradigm, verb_paradigm_features,
+                         word_classes)
 
 ACTIVE_INDICATIVE_EXAMPLES = [
     (
@@ -1867,3 +1876,140 @@ def test_inflect_not_implemented_pronoun(inflection, expected):
 @pytest.mark.parametrize("inflection,expected", NOT_YET_IMPLEMENTED_VERB_EXAMPLES)
 def test_inflect_not_implemented_verb(inflection, expected):
     assert conjugate_verb(**inflection) == expected
+
+
+def test_paradigm_cache():
+    paradigm_cache.cache_clear()
+    profile_cache.cache_clear()
+    conjugate_verb('ostaa', tense='Pres', person='1', number='Sing')
+    conjugate_verb('ostaa', tense='Past', person='1', number='Sing')
+    assert paradigm_cache.cache_info().misses == 1
+    info = profile_cache.cache_info()
+    assert info.misses == 1
+    assert info.hits >= 1
+
+
+def test_lexeme_profile():
+    profile = lexeme_profile('ostaa', required_wclass='verbi')
+    assert profile is lexeme_profile('ostaa', required_wclass='verbi')
+    assert profile.strong_vowel_stem == 'osta'
+    assert not profile.is_supistuma
+    assert lexeme_profile('pelata', required_wclass='verbi').is_supistuma
+
+    profile = lexeme_profile('iso', required_wclass='subst')
+    assert profile.degree_root('Cmp')[0] == 'iso'
+    assert profile.degree_root('Sup')[0] == 'iso'
+
+
+def test_precomputed_compound_splits(tmp_path, monkeypatch):
+    monkeypatch.setattr(inflect, 'compound_splits', {})
+    splits_file = tmp_path / 'compound_splits.tsv'
+    splits_file.write_text('kissankello\tkissan\tkello\ntalo\t\ttalo\n', encoding='utf-8')
+    load_compound_splits(splits_file)
+
+    assert inflect.compound_splits['kissankello'] == ('kissan', 'kello')
+    assert inflect.compound_splits['talo'] == ('', 'talo')
+    assert inflect_nominal('kissankello', case='Ine', number='Plur') == 'kissankelloissa'
+
+
+def test_inflect_many():
+    examples = (
+        [('teonsana', x) for x in ACTIVE_INDICATIVE_EXAMPLES + PASSIVE_EXAMPLES + PARTICIPLE_EXAMPLES] +
+        [('nimisana', x) for x in NOUN_EXAMPLES + ADJECTIVE_EXAMPLES] +
+        [('asemosana', x) for x in PRONOUN_EXAMPLES] +
+        [('sidesana', ({'token': 'ja'}, 'ja'))]
+    )
+    requests = []
+    for word_class, (inflection, _) in examples:
+        features = dict(inflection)
+        lexeme = features.pop('token')
+        requests.append((lexeme, word_class, features))
+
+    assert inflect_many(requests) == [expected for _, (_, expected) in examples]
+
+
+@pytest.mark.parametrize("word,expected", [
+    ('olla', True),
+    ('ostaa', True),
+    ('kadota', False),
+    ('hypätä', False),
+    ('HYPÄTÄ', False),
+    ('uida', True),
+    ('muistella', False),
+])
+def test_has_two_syllables_inaccurate(word, expected):
+    assert _has_two_syllables_inaccurate(word) == expected
+
+
+def test_voikko_word_list_is_loaded_lazily():
+    code = 'import sys, src.inflect; print("voikko.inflect_word" in sys.modules)'
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert proc.stdout.strip() == 'False'
+
+
+def test_word_classes_are_patched():
+    classes = word_classes()
+    assert not any('subst-kaunis' in x or 'subst-tosi' in x or 'verbi-taitaa' in x
+                   for x in classes.values())
+
+
+@pytest.mark.parametrize('lexeme', ['talo', 'kaunis', 'hyvä', 'uusi', 'vesi', 'kissankello'])
+def test_nominal_paradigm(lexeme):
+    table = nominal_paradigm(lexeme)
+    assert len(table) == 15 * 2 * 3 * 6
+    for key, form in table.items():
+        assert form == inflect_nominal(lexeme, **dict(zip(nominal_paradigm_features, key)))
+
+
+def test_nominal_paradigm_without_degrees():
+    table = nominal_paradigm('talo', degrees=(None,))
+    assert len(table) == 15 * 2 * 6
+    assert {key[2] for key in table} == {None}
+    assert table[('Ine', 'Plur', None, None, None)] == 'taloissa'
+
+
+@pytest.mark.parametrize('lexeme', ['ostaa', 'olla', 'juosta', 'tehdä', 'pelata', 'taitaa', 'ei'])
+def test_verb_paradigm(lexeme):
+    table = verb_paradigm(lexeme)
+    assert table
+    for key, form in table.items():
+        assert form == conjugate_verb(lexeme, **dict(zip(verb_paradigm_features, key)))
+
+
+def test_persistent_cache(tmp_path):
+    path = tmp_path / 'inflections.sqlite3'
+    requests = [('talo', 'nimisana', {'case': 'Ine', 'number': 'Plur'}),
+                ('ostaa', 'teonsana', {'tense': 'Past', 'person': '3', 'number': 'Sing', 'mood': 'Ind'}),
+                ('ja', 'sidesana', {})]
+    try:
+        open_persistent_cache(path)
+        assert inflect_many(requests) == ['taloissa', 'osti', 'ja']
+        close_persistent_cache()
+
+        cache = open_persistent_cache(path)
+        assert len(cache) == 2
+        assert inflect_many(requests) == ['taloissa', 'osti', 'ja']
+        assert cache.cache_info().hits == 2
+    finally:
+        close_persistent_cache()
+
+
+def test_olla_table_matches_general_conjugation():
+    profile = lexeme_profile('olla', required_wclass='verbi')
+    for features in itertools.product([None, 'Pres', 'Past'], ['1', '2', '3', '4'], ['Sing', 'Plur'],
+                                      [None, 'Ind', 'Cnd', 'Imp', 'Pot'], [None, '1', '2'],
+                                      [None, 'Pres', 'Past', 'Agt'], [False, True]):
+        try:
+            expected = _conjugate_verb_forms('olla', profile, *features)
+        except (KeyError, TypeError):
+            continue
+        assert conjugate_verb('olla', **dict(zip(verb_paradigm_features, features))) == expected
+
+
+def test_pronoun_table_matches_general_inflection():
+    for token in ['minä', 'sinä', 'hän', 'se', 'tämä', 'tuo', 'joka', 'kuka', 'mikä']:
+        for case in ['Nom', 'Gen', 'Acc', 'Par', 'Ess', 'Tra', 'Ine', 'Ela', 'Ill', 'Ade',
+                     'Abl', 'All', 'Abe', 'Ins', 'Com']:
+            for number in ['Sing', 'Plur']:
+                assert (inflect_pronoun(token, case=case, number=number) ==
+                        _inflect_pronoun(token, case, number))
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from src import inflect
+from src.morphology import RecordingBackend, TableBackend, VoikkoBackend, get_voikko
+
+# Recorded with RecordingBackend from the paradigms of talo, kissankello and ostaa
+recorded_paradigms = Path(__file__).parent / 'data' / 'paradigms.sqlite3'
+
+
+@pytest.fixture
+def restore_backend():
+    yield
+    inflect.set_backend(VoikkoBackend())
+
+
+@pytest.fixture
+def libvoikko():
+    try:
+        get_voikko()
+    except OSError:
+        pytest.skip('libvoikko can not be loaded')
+
+
+def test_table_backend_inflects_without_voikko(restore_backend):
+    inflect.set_backend(TableBackend(recorded_paradigms))
+    assert inflect.inflect_nominal('talo', case='Ine', number='Plur') == 'taloissa'
+    assert inflect.inflect_nominal('talo', case='Gen', person_psor='1', number_psor='Sing') == 'taloni'
+    assert inflect.inflect_nominal('kissankello', case='Ine', number='Plur') == 'kissankelloissa'
+    assert inflect.conjugate_verb('ostaa', tense='Past', person='3', number='Plur') == 'ostivat'
+    assert inflect.inflect_nominal('kissa', case='Ine') == 'kissa'
+
+
+def test_table_backend_with_fallback_does_not_load_voikko_for_recorded_words():
+    code = ('import sys\n'
+            'from src import inflect\n'
+            'from src.morphology import TableBackend, VoikkoBackend\n'
+            f'inflect.set_backend(TableBackend({str(recorded_paradigms)!r}, fallback=VoikkoBackend()))\n'
+            'print(inflect.inflect_nominal("kissankello", case="Ine", number="Plur"))\n'
+            'print("voikko.inflect_word" in sys.modules)\n')
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert proc.stdout.split() == ['kissankelloissa', 'False']
+
+
+def test_table_backend_reproduces_recorded_inflections(tmp_path, libvoikko, restore_backend):
+    nominals = ['talo', 'kaunis', 'hyvä', 'kissankello']
+    verbs = ['ostaa', 'juosta']
+    recorder = RecordingBackend(VoikkoBackend())
+    inflect.set_backend(recorder)
+    expected = ([inflect.nominal_paradigm(x) for x in nominals] +
+                [inflect.verb_paradigm(x) for x in verbs])
+    path = tmp_path / 'paradigms.sqlite3'
+    recorder.write(path)
+
+    inflect.set_backend(TableBackend(path))
+    assert ([inflect.nominal_paradigm(x) for x in nominals] +
+            [inflect.verb_paradigm(x) for x in verbs]) == expected
+
+
+def test_table_backend_without_fallback(tmp_path):
+    path = tmp_path / 'paradigms.sqlite3'
+    RecordingBackend(VoikkoBackend()).write(path)
+    table = TableBackend(path)
+    assert table.paradigm('talo', required_wclass='subst') == {}
+    assert table.inflection_classes('talo') is None
+    assert table.analyze('kissankello') == []
+
+
+def test_table_backend_fallback(tmp_path):
+    path = tmp_path / 'paradigms.sqlite3'
+    RecordingBackend(VoikkoBackend()).write(path)
+    voikko = VoikkoBackend()
+    table = TableBackend(path, fallback=voikko)
+    assert table.paradigm('talo', required_wclass='subst') == voikko.paradigm('talo', required_wclass='subst')
+    assert table.inflection_classes('talo') == voikko.inflection_classes('talo')
+
+
+def test_table_backend_version_includes_fallback():
+    class Fallback:
+        def __init__(self, version):
+            self._version = version
+
+        def version(self):
+            return self._version
+
+    table = TableBackend(recorded_paradigms)
+    a = TableBackend(recorded_paradigms, fallback=Fallback('a'))
+    b = TableBackend(recorded_paradigms, fallback=Fallback('b'))
+    assert len({table.version(), a.version(), b.version()}) == 3
+
+
+def test_table_backend_from_several_threads():
+    table = TableBackend(recorded_paradigms)
+    expected = table.paradigm('ostaa', required_wclass='verbi')
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(lambda _: table.paradigm('ostaa', required_wclass='verbi'), range(8)))
+    assert expected
+    assert results == [expected] * 8
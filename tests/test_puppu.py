@@ -0,0 +1,273 @@
+import pickle
+import random
+import pytest
+from src import puppu
+from src.puppu import Grammar, Optional, Rule, Terminal, Vocabulary, Weighted, grammar
+from src.sampling import AliasTable
+
+
+def write_vocabulary(path, word_classes):
+    for word_class, lines in word_classes.items():
+        (path / (word_class + '.txt')).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def test_vocabulary_loads_word_classes_on_first_use(tmp_path):
+    write_vocabulary(tmp_path, {
+        'nimisana': ['3 talo', '1 kissa'],
+        'suhdesana': ['yli'],
+    })
+    vocabulary = Vocabulary(tmp_path)
+    assert vocabulary.vocabulary == {}
+
+    assert vocabulary.random_word('nimisana') in ('talo', 'kissa')
+    assert set(vocabulary.vocabulary) == {'nimisana'}
+
+
+@pytest.mark.parametrize('prefetch', [0, 16])
+def test_vocabulary_reseeding_reproduces_words(tmp_path, prefetch):
+    write_vocabulary(tmp_path, {'nimisana': ['3 talo', '1 kissa', '2 koira', '1 hevonen']})
+    vocabulary = Vocabulary(tmp_path, prefetch=prefetch)
+    random.seed(3)
+    expected = [vocabulary.random_word('nimisana') for _ in range(20)]
+    random.seed(3)
+    vocabulary.clear_prefetch()
+    assert [vocabulary.random_word('nimisana') for _ in range(20)] == expected
+
+
+def test_vocabulary_unknown_word_class(tmp_path):
+    vocabulary = Vocabulary(tmp_path)
+    assert vocabulary.random_word('teonsana') == ''
+    assert vocabulary.sample('teonsana', 5) == []
+
+
+def test_sampled_word_classes():
+    g = Grammar({
+        'S': [[Rule('NP'), Terminal('teonsana', 'olla'), Optional(Terminal('seikkasana'))]],
+        'NP': [[Terminal('laatusana'), Terminal('nimisana')],
+               [Terminal('asemosana', ['minä', 'sinä'])]],
+    })
+    assert g.sampled_word_classes() == {'laatusana', 'nimisana', 'seikkasana'}
+
+
+def test_default_grammar_does_not_sample_closed_word_classes():
+    word_classes = grammar.sampled_word_classes()
+    assert 'asemosana' not in word_classes
+    assert 'sidesana' not in word_classes
+    assert 'suhdesana' not in word_classes
+
+
+def test_compact_vocabulary(tmp_path):
+    write_vocabulary(tmp_path, {'nimisana': ['3 talo', '1 kissa', '2 äyriäinen']})
+    vocabulary = Vocabulary(tmp_path, compact=True)
+
+    words = vocabulary.sample('nimisana', 100)
+    assert set(words) <= {'talo', 'kissa', 'äyriäinen'}
+    assert all(isinstance(w, str) for w in words)
+
+
+def test_shared_vocabulary(tmp_path):
+    write_vocabulary(tmp_path, {'nimisana': ['3 talo', '1 kissa', '2 äyriäinen']})
+    vocabulary = Vocabulary(tmp_path)
+    shared = vocabulary.share(['nimisana'])
+    try:
+        attached = Vocabulary.attach(shared)
+        assert list(attached.vocabulary['nimisana'][0]) == ['talo', 'kissa', 'äyriäinen']
+        assert set(attached.sample('nimisana', 50)) <= {'talo', 'kissa', 'äyriäinen'}
+        attached.detach()
+    finally:
+        vocabulary.unlink_shared()
+
+
+def test_reload_changed_word_classes(tmp_path):
+    write_vocabulary(tmp_path, {'nimisana': ['talo'], 'teonsana': ['olla']})
+    vocabulary = Vocabulary(tmp_path)
+    vocabulary.preload(['nimisana', 'teonsana'])
+    assert vocabulary.random_word('nimisana') == 'talo'
+    assert vocabulary.reload_changed() == []
+
+    write_vocabulary(tmp_path, {'nimisana': ['kissa', 'koira']})
+    assert vocabulary.reload_changed() == ['nimisana']
+    assert set(vocabulary.sample('nimisana', 20)) == {'kissa', 'koira'}
+    assert vocabulary.random_word('nimisana') in ('kissa', 'koira')
+    assert vocabulary.random_word('teonsana') == 'olla'
+
+
+def test_truncated_vocabulary(tmp_path):
+    write_vocabulary(tmp_path, {'nimisana': ['1 talo', '5 kissa', '3 koira', '1 hiiri']})
+    vocabulary = Vocabulary(tmp_path, top_n=2, compact=True)
+
+    assert set(vocabulary.sample('nimisana', 50)) == {'kissa', 'koira'}
+    assert list(vocabulary.vocabulary['nimisana'][1]) == [5.0, 3.0]
+
+
+def test_threaded_generation_matches_single_thread(tmp_path):
+    write_vocabulary(tmp_path, {
+        'nimisana': ['talo', 'kissa', 'koira'],
+        'laatusana': ['hyvä', 'punainen'],
+        'teonsana': ['ostaa', 'juosta', 'kadota'],
+        'seikkasana': ['aina'],
+    })
+
+    random.seed(1)
+    expected = grammar.generate_many('SENTENCE', Vocabulary(tmp_path), 50)
+    random.seed(1)
+    assert grammar.generate_many('SENTENCE', Vocabulary(tmp_path), 50, threads=4) == expected
+
+    # The pool and the Voikko handles of its threads are reused
+    pool = puppu._thread_pools[4]
+    random.seed(1)
+    assert grammar.generate_many('SENTENCE', Vocabulary(tmp_path), 50, threads=4) == expected
+    assert puppu._thread_pools[4] is pool
+
+
+class FixedVocabulary:
+    def random_word(self, word_class):
+        return word_class + str(random.randrange(3))
+
+
+def interpret(rules, rule_name, vocabulary, attributes):
+    """Expand the rule objects directly instead of running the compiled program."""
+    generated = []
+    alternatives = rules[rule_name]
+    weights = [x.weight if isinstance(x, Weighted) else 1 for x in alternatives]
+    alternative = alternatives[AliasTable(weights).draw()]
+    if isinstance(alternative, Weighted):
+        alternative = alternative.rules
+
+    for rule in alternative:
+        if isinstance(rule, Optional):
+            if AliasTable([1 - rule.p, rule.p]).draw():
+                rule = rule.rule
+            else:
+                continue
+
+        attributes2 = {**attributes, **rule.attributes}
+        if isinstance(rule, Rule):
+            generated.extend(interpret(rules, rule.name, vocabulary, attributes2))
+        else:
+            generated.append((rule.get_lexeme(vocabulary), rule.word_class, attributes2))
+    return generated
+
+
+def test_compiled_grammar_matches_interpreted_rules():
+    vocabulary = FixedVocabulary()
+    attributes = {'case': 'Nom', 'number': 'Sing', 'person': '3', 'tense': 'Pres', 'mood': 'Ind'}
+
+    random.seed(2)
+    expected = [interpret(grammar.rules, 'SENTENCE', vocabulary, attributes) for _ in range(500)]
+    random.seed(2)
+    generated = [grammar._expand('SENTENCE', vocabulary, attributes) for _ in range(500)]
+    assert generated == expected
+
+
+def test_unknown_rule_object():
+    with pytest.raises(ValueError):
+        Grammar({'S': [[Rule('NP'), 'talo']], 'NP': [[Terminal('nimisana')]]})
+
+
+def test_shortest_alternatives():
+    g = Grammar({
+        'S': [[Rule('S'), Terminal('sidesana', 'ja'), Rule('S')],
+              [Rule('NP'), Terminal('teonsana', 'olla')]],
+        'NP': [[Rule('NP'), Terminal('nimisana')],
+               [Optional(Terminal('laatusana')), Terminal('nimisana'), Terminal('nimisana')],
+               [Terminal('asemosana', 'hän'), Optional(Rule('S'))]],
+    })
+    assert g.shortest[g.rule_ids['S']] == g.program[g.rule_ids['S']][1]
+    assert g.shortest[g.rule_ids['NP']] == g.program[g.rule_ids['NP']][2]
+
+
+def test_rule_that_never_terminates():
+    with pytest.raises(ValueError):
+        Grammar({'S': [[Rule('NP')]], 'NP': [[Rule('S'), Terminal('nimisana')]]})
+
+
+def test_generation_budget():
+    g = Grammar({
+        'S': [[Rule('S'), Terminal('sidesana', 'ja'), Rule('S')],
+              [Terminal('teonsana', 'olla')]],
+    }, max_depth=2, max_tokens=None)
+    random.seed(0)
+    assert max(len(g._expand('S', FixedVocabulary(), {})) for _ in range(200)) == 7
+
+    g = Grammar({
+        'S': [[Terminal('nimisana', 'talo'), Rule('S')],
+              [Terminal('nimisana', 'talo')]],
+    }, max_depth=None, max_tokens=1)
+    random.seed(0)
+    assert max(len(g._expand('S', FixedVocabulary(), {})) for _ in range(200)) == 2
+
+
+def test_deep_expansion_does_not_hit_the_recursion_limit(monkeypatch):
+    g = Grammar({
+        'S': [[Terminal('nimisana', 'talo'), Rule('S')],
+              [Terminal('nimisana', 'talo')]],
+    }, max_depth=3000, max_tokens=None)
+    # Always draw the first alternative
+    monkeypatch.setattr(random, 'random', lambda: 0.0)
+    assert len(g._expand('S', FixedVocabulary(), {})) == 3001
+
+
+def test_weighted_alternatives():
+    g = Grammar({
+        'S': [[Terminal('nimisana', 'talo')],
+              Weighted([Terminal('nimisana', 'kissa')], 3),
+              [Terminal('nimisana', 'koira'), Optional(Terminal('seikkasana', 'aina'), 0.25)]],
+    })
+    random.seed(0)
+    words = [w for _ in range(10000) for w, _, _ in g._expand('S', FixedVocabulary(), {})]
+    assert words.count('kissa') == pytest.approx(6000, rel=0.05)
+    assert words.count('talo') == pytest.approx(2000, rel=0.1)
+    assert words.count('aina') == pytest.approx(500, rel=0.2)
+
+
+@pytest.mark.parametrize('rules', [
+    {'S': [Weighted([Terminal('nimisana')], 0)]},
+    {'S': [[Optional(Terminal('nimisana'), 1.5)]]},
+    {'S': []},
+])
+def test_invalid_weights(rules):
+    with pytest.raises(ValueError):
+        Grammar(rules)
+
+
+@pytest.mark.parametrize('max_depth,max_tokens', [(40, 100), (3, 8), (5, None)])
+def test_generated_code_matches_program(max_depth, max_tokens):
+    program = Grammar(grammar.rules, max_depth=max_depth, max_tokens=max_tokens)
+    generated = Grammar(grammar.rules, max_depth=max_depth, max_tokens=max_tokens)
+    generated.compile_python()
+    vocabulary = FixedVocabulary()
+    attributes = {'case': 'Nom', 'number': 'Sing', 'person': '3', 'tense': 'Pres', 'mood': 'Ind'}
+
+    random.seed(3)
+    expected = [program._expand('SENTENCE', vocabulary, attributes) for _ in range(500)]
+    random.seed(3)
+    assert [generated._expand('SENTENCE', vocabulary, attributes) for _ in range(500)] == expected
+
+
+def test_generated_code_cache(tmp_path, monkeypatch):
+    Grammar(grammar.rules).compile_python(tmp_path)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError('compile() called')
+
+    g = Grammar(grammar.rules)
+    with monkeypatch.context() as m:
+        m.setattr('builtins.compile', fail)
+        g.compile_python(tmp_path)
+    assert g.generated_rules is not None
+
+    Grammar(grammar.rules, max_depth=10).compile_python(tmp_path)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_pickled_grammar_keeps_generated_code():
+    g = Grammar(grammar.rules)
+    g.compile_python()
+    assert pickle.loads(pickle.dumps(g)).generated_rules is not None
+
+
+def test_generated_code_needs_max_depth():
+    with pytest.raises(ValueError):
+        Grammar(grammar.rules, max_depth=None).compile_python()
@@ -0,0 +1,47 @@
+import random
+from collections import Counter
+import pytest
+from src.sampling import AliasTable
+
+
+@pytest.mark.parametrize("weights", [
+    [1.0],
+    [1.0, 1.0, 1.0, 1.0],
+    [5.0, 1.0, 3.0, 1.0],
+    [1000.0, 1.0, 0.0, 10.0, 100.0],
+    [1.0 / (rank + 1) for rank in range(50)],
+])
+def test_alias_table_distribution(weights):
+    rng = random.Random(1234)
+    table = AliasTable(weights)
+    n_draws = 200000
+    counts = Counter(table.draw(rng) for _ in range(n_draws))
+
+    total = sum(weights)
+    for i, w in enumerate(weights):
+        expected = w / total
+        observed = counts[i] / n_draws
+        assert abs(observed - expected) < 0.01
+
+
+def test_alias_table_never_draws_zero_weights():
+    rng = random.Random(1)
+    table = AliasTable([0.0, 2.0, 0.0, 1.0])
+    assert {table.draw(rng) for _ in range(10000)} == {1, 3}
+
+
+def test_alias_table_sample_matches_distribution():
+    rng = random.Random(42)
+    weights = [5.0, 1.0, 3.0, 1.0]
+    table = AliasTable(weights)
+    n_draws = 200000
+    counts = Counter(table.sample(n_draws, rng))
+
+    for i, w in enumerate(weights):
+        assert abs(counts[i] / n_draws - w / sum(weights)) < 0.01
+
+
+@pytest.mark.parametrize("weights", [[0.0], [0.0, 0.0, 0.0], [1.0, -1.0]])
+def test_alias_table_rejects_weights_without_positive_total(weights):
+    with pytest.raises(ValueError):
+        AliasTable(weights)
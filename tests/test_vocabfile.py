@@ -0,0 +1,69 @@
+import pytest
+from src.sampling import AliasTable
+from src.vocabfile import open_compiled, read_text, record_size, truncate, write_compiled
+
+
+def test_compiled_round_trip(tmp_path):
+    words = ['talo', 'äiti', 'öljy', 'kissankello', 'x']
+    weights = [10.0, 2.0, 0.5, 1.0, 100.0]
+    path = tmp_path / 'nimisana.bin'
+    write_compiled(path, words, weights)
+
+    loaded_words, loaded_weights, sampler = open_compiled(path)
+    expected = AliasTable(weights)
+    assert len(loaded_words) == len(words)
+    assert list(loaded_words) == words
+    assert loaded_words[-1] == 'x'
+    assert list(loaded_weights) == pytest.approx(weights)
+    assert list(sampler.prob) == list(expected.prob)
+    assert list(sampler.alias) == list(expected.alias)
+
+
+def test_compiled_empty_word_class(tmp_path):
+    path = tmp_path / 'sidesana.bin'
+    write_compiled(path, [], [])
+
+    words, weights, sampler = open_compiled(path)
+    assert len(words) == 0
+    assert len(weights) == 0
+    assert len(sampler) == 0
+
+
+def test_read_text(tmp_path):
+    path = tmp_path / 'teonsana.txt'
+    path.write_text('12 olla\nostaa\n3.5 hypätä\n', encoding='utf-8')
+
+    assert read_text(path) == (['olla', 'ostaa', 'hypätä'], [12.0, 1.0, 3.5])
+
+
+def test_read_text_compact(tmp_path):
+    path = tmp_path / 'nimisana.txt'
+    path.write_text('12 talo\nkissa\n3.5 äyriäinen\n', encoding='utf-8')
+
+    words, weights = read_text(path, compact=True)
+    assert list(words) == ['talo', 'kissa', 'äyriäinen']
+    assert list(weights) == [12.0, 1.0, 3.5]
+
+
+@pytest.mark.parametrize("options,expected", [
+    ({'top_n': 2}, ['c', 'a']),
+    ({'min_freq': 2.0}, ['c', 'a', 'd']),
+    ({'top_n': 10, 'min_freq': 4.0}, ['c', 'a']),
+    ({'max_bytes': 2 * (record_size + 1)}, ['c', 'a']),
+    ({'max_bytes': 10}, []),
+])
+def test_truncate(options, expected):
+    words = ['a', 'b', 'c', 'd']
+    weights = [5.0, 1.0, 10.0, 2.0]
+
+    kept_words, kept_weights = truncate(words, weights, **options)
+    assert kept_words == expected
+    assert kept_weights == [weights[words.index(w)] for w in expected]
+
+
+def test_min_freq_on_truncated_compiled_file(tmp_path):
+    words, weights = truncate(['a', 'b', 'c', 'd'], [5.0, 1.0, 10.0, 2.0], top_n=3)
+    write_compiled(tmp_path / 'nimisana.bin', words, weights)
+
+    kept_words, _ = truncate(*open_compiled(tmp_path / 'nimisana.bin')[:2], min_freq=2.0)
+    assert kept_words == ['c', 'a', 'd']
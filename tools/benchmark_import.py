@@ -0,0 +1,48 @@
+"""Measure how long it takes to import the generator modules.
+
+Imports each module in a fresh interpreter with python -X importtime,
+repeats a few times and prints the median cumulative import time. Exits
+with a non-zero status if a module exceeds the budget. Run from the
+repository root:
+
+    python -m tools.benchmark_import [--repeat N] [--budget-ms MS]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+modules = ['src.inflect', 'src.puppu']
+
+
+def import_time_us(module):
+    """Return the cumulative import time of module in microseconds."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                          capture_output=True, text=True, check=True)
+    for line in proc.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = [x.strip() for x in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError(f'No import time reported for {module}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='imports per module')
+    parser.add_argument('--budget-ms', type=float, default=300.0,
+                        help='maximum median import time per module')
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in modules:
+        ms = statistics.median(import_time_us(module) for _ in range(args.repeat)) / 1000
+        status = 'ok' if ms <= args.budget_ms else 'OVER BUDGET'
+        print(f'{module:<14} {ms:8.1f} ms  {status}')
+        over_budget = over_budget or ms > args.budget_ms
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
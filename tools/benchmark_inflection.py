@@ -0,0 +1,159 @@
+"""Benchmark inflection on the example tables of tests/test_inflect.py.
+
+Replays the *_EXAMPLES tables (except the not yet implemented ones) and
+reports calls per second and the median and 99th percentile latency for
+each table and for each inflection code path. In the cold variant the
+caches are cleared before every call, so each call generates its paradigm.
+In the warm variant the tables are replayed --rounds times after priming
+the caches. Run from the repository root:
+
+    python -m tools.benchmark_inflection [--rounds N] [--output results.json]
+                                         [--baseline baseline.json]
+
+--output saves the results as JSON. --baseline compares calls per second
+against results saved earlier.
+"""
+import argparse
+import inspect
+import json
+import platform
+import time
+from src import inflect
+from tests import test_inflect
+
+functions = {
+    'conjugate_verb': inflect.conjugate_verb,
+    'inflect_nominal': inflect.inflect_nominal,
+    'inflect_pronoun': inflect.inflect_pronoun,
+}
+
+
+def example_tables():
+    """Return a list of (category, function name, list of keyword arguments)."""
+    tables = []
+    for name in sorted(dir(test_inflect)):
+        if not name.endswith('_EXAMPLES') or name.startswith('NOT_YET_IMPLEMENTED'):
+            continue
+        if name.startswith(('ACTIVE', 'PASSIVE', 'PARTICIPLE', 'INFINITE')):
+            function = 'conjugate_verb'
+        elif name.startswith('PRONOUN'):
+            function = 'inflect_pronoun'
+        else:
+            function = 'inflect_nominal'
+        category = name[:-len('_EXAMPLES')].lower()
+        tables.append((category, function, [x for x, _ in getattr(test_inflect, name)]))
+    return tables
+
+
+def code_path(function, kwargs):
+    """Return the name of the function that does the work for a call."""
+    if function == 'inflect_pronoun':
+        return 'inflect_pronoun'
+    elif function == 'inflect_nominal':
+        return '_inflect_nominal_simple_stem'
+
+    bound = inspect.signature(inflect.conjugate_verb).bind(**kwargs)
+    bound.apply_defaults()
+    f = bound.arguments
+    if f['token'] == 'ei':
+        return '_conjugate_negation_verb'
+    elif f['token'] == 'olla':
+        return '_olla_table'
+    elif f['connegative']:
+        return '_conjugate_verb_connegative'
+    elif f['infform']:
+        return '_conjugate_verb_infinite'
+    elif f['partform']:
+        return '_conjugate_verb_participle'
+    elif f['person'] == '4':
+        return '_conjugate_verb_passive'
+    elif f['mood'] == 'Cnd':
+        return '_conjugate_verb_conditional'
+    elif f['mood'] == 'Imp':
+        return '_conjugate_verb_imperative'
+    elif f['mood'] == 'Pot':
+        return '_conjugate_verb_potential'
+    else:
+        return '_conjugate_verb_indicative'
+
+
+def replay(tables, rounds, cold):
+    """Time every call. Returns {('category' or 'path', name): [nanoseconds]}."""
+    latencies = {}
+    for _ in range(rounds):
+        for category, function, calls in tables:
+            f = functions[function]
+            for kwargs in calls:
+                if cold:
+                    inflect.clear_caches()
+                start = time.perf_counter_ns()
+                f(**kwargs)
+                elapsed = time.perf_counter_ns() - start
+                latencies.setdefault(('category', category), []).append(elapsed)
+                latencies.setdefault(('path', code_path(function, kwargs)), []).append(elapsed)
+    return latencies
+
+
+def summarize(latencies):
+    results = {'category': {}, 'path': {}}
+    for (kind, name), times in sorted(latencies.items()):
+        times = sorted(times)
+        n = len(times)
+        results[kind][name] = {
+            'calls': n,
+            'calls_per_sec': n / (sum(times) / 1e9),
+            'p50_us': times[n // 2] / 1000,
+            'p99_us': times[min(n - 1, int(n * 0.99))] / 1000,
+        }
+    return results
+
+
+def print_results(variant, results, baseline):
+    print(f'\n{variant}')
+    print(f'{"":<30} {"calls/s":>12} {"p50 us":>10} {"p99 us":>10} {"vs base":>8}')
+    for kind in ['category', 'path']:
+        for name, r in results[kind].items():
+            line = f'{name:<30} {r["calls_per_sec"]:>12,.0f} {r["p50_us"]:>10.1f} {r["p99_us"]:>10.1f}'
+            base = baseline.get(variant, {}).get(kind, {}).get(name) if baseline else None
+            if base:
+                line += f' {r["calls_per_sec"] / base["calls_per_sec"]:>7.2f}x'
+            print(line)
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=20, help='replays of the warm variant')
+    parser.add_argument('--output', help='save the results to this JSON file')
+    parser.add_argument('--baseline', help='compare to results saved with --output')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    tables = example_tables()
+    # Import Voikko before measuring
+    replay(tables, 1, cold=False)
+
+    results = {
+        'cold': summarize(replay(tables, 1, cold=True)),
+        'warm': summarize(replay(tables, args.rounds, cold=False)),
+    }
+    for variant, variant_results in results.items():
+        print_results(variant, variant_results, baseline)
+
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'backend': type(inflect.backend).__name__,
+            'rounds': args.rounds,
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
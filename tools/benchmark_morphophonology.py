@@ -0,0 +1,103 @@
+"""Benchmark the morphophonology helpers of src/inflect.py.
+
+Compares the current helpers with the earlier regular expression based
+implementations on the tokens of tests/test_inflect.py, checks that both
+give the same results, and prints calls per second. Run from the repository
+root:
+
+    python -m tools.benchmark_morphophonology
+"""
+import re
+import time
+from voikko.voikkoutils import VOWEL_BACK, get_wordform_infl_vowel_type
+from src import inflect
+from tests import test_inflect
+
+diphthong_expression = 'aa|ee|ii|oo|uu|yy|ää|öö|ai|ei|oi|ui|yi|äi|öi|au|eu|iu|ou|äy|öy|iy|ey|ie|uo|yö'
+
+
+def regex_has_two_syllables_inaccurate(word):
+    syllable_elements = [
+        '[bcdfghjklmnpqrstvwxz][aeiouyäö]',
+        diphthong_expression,
+        '[aeiouyäö][bcdfghjklmnpqrstvwxz]',
+    ]
+    x = sum(1 for _ in re.finditer('|'.join(syllable_elements), word, re.IGNORECASE))
+    return x <= 2
+
+
+def regex_is_diphthong_or_long_vowel(two_character_string):
+    return re.fullmatch(diphthong_expression, two_character_string) is not None
+
+
+def regex_replace_vowel_placeholders(s, vowel_type):
+    def vowel_repl(vowel_class):
+        if vowel_class.group(0) == 'A':
+            return 'a' if vowel_type == VOWEL_BACK else 'ä'
+        elif vowel_class.group(0) == 'O':
+            return 'o' if vowel_type == VOWEL_BACK else 'ö'
+        elif vowel_class.group(0) == 'U':
+            return 'u' if vowel_type == VOWEL_BACK else 'y'
+    return re.sub('[AOU]', vowel_repl, s)
+
+
+def list_is_vowel(c):
+    return c.lower() in ['a', 'e', 'i', 'o', 'u', 'y', 'ä', 'ö', 'å']
+
+
+def regex_append_affix_with_vowel_harmony(stem, affix):
+    vowel_type = get_wordform_infl_vowel_type(stem)
+    affix = regex_replace_vowel_placeholders(affix, vowel_type)
+    return stem + affix
+
+
+def example_tokens():
+    tokens = set()
+    for name in dir(test_inflect):
+        if name.endswith('_EXAMPLES'):
+            for inflection, expected in getattr(test_inflect, name):
+                tokens.add(inflection['token'])
+                tokens.add(expected)
+    return sorted(tokens)
+
+
+def calls_per_second(f, args_list, min_seconds=0.5):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for args in args_list:
+            f(*args)
+        count += len(args_list)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return count / elapsed
+
+
+def main():
+    tokens = example_tokens()
+    affixes = ['A', 'nA', 'ssA', 'stA', 'tAvA', 'kOOn', 'vAt', 'tU', 'mpA', 'impi', '']
+    workloads = [
+        ('_has_two_syllables_inaccurate', regex_has_two_syllables_inaccurate,
+         inflect._has_two_syllables_inaccurate, [(t,) for t in tokens]),
+        ('_is_diphthong_or_long_vowel', regex_is_diphthong_or_long_vowel,
+         inflect._is_diphthong_or_long_vowel, [(t[-2:],) for t in tokens]),
+        ('replace_vowel_placeholders', regex_replace_vowel_placeholders,
+         inflect.replace_vowel_placeholders,
+         [(a, vt) for a in affixes for vt in (0, 1, 2, 3)]),
+        ('is_vowel', list_is_vowel, inflect.is_vowel, [(c,) for t in tokens for c in t]),
+        ('_append_affix_with_vowel_harmony', regex_append_affix_with_vowel_harmony,
+         inflect._append_affix_with_vowel_harmony, [(t, a) for t in tokens for a in affixes]),
+    ]
+
+    print(f'{"function":<34} {"before":>14} {"after":>14} {"speedup":>8}')
+    for name, before, after, args_list in workloads:
+        for args in args_list:
+            assert before(*args) == after(*args), (name, args)
+
+        before_rate = calls_per_second(before, args_list)
+        after_rate = calls_per_second(after, args_list)
+        print(f'{name:<34} {before_rate:>14,.0f} {after_rate:>14,.0f} {after_rate / before_rate:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark nominal_paradigm and verb_paradigm of src/inflect.py.
+
+Compares generating full inflection tables with a loop that calls
+inflect_nominal or conjugate_verb once per form. The lexemes are taken from
+tests/test_inflect.py. Run from the repository root:
+
+    python -m tools.benchmark_paradigms
+"""
+import time
+from src import inflect
+from tests import test_inflect
+
+
+def example_lexemes(prefixes):
+    lexemes = set()
+    for name in dir(test_inflect):
+        if name.endswith('_EXAMPLES') and name.startswith(prefixes):
+            for inflection, _ in getattr(test_inflect, name):
+                lexemes.add(inflection['token'])
+    return sorted(lexemes)
+
+
+def tables_per_second(f, lexemes, min_seconds=1.0):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for lexeme in lexemes:
+            f(lexeme)
+        count += len(lexemes)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return count / elapsed
+
+
+def main():
+    nominal_keys = list(inflect.nominal_paradigm('talo'))
+    verb_keys = list(inflect.verb_paradigm('ostaa'))
+
+    def nominal_loop(lexeme):
+        return {key: inflect.inflect_nominal(lexeme, **dict(zip(inflect.nominal_paradigm_features, key)))
+                for key in nominal_keys}
+
+    def verb_loop(lexeme):
+        return {key: inflect.conjugate_verb(lexeme, **dict(zip(inflect.verb_paradigm_features, key)))
+                for key in verb_keys}
+
+    nominals = example_lexemes(('NOUN', 'ADJECTIVE', 'NUMERAL'))
+    verbs = [x for x in example_lexemes(('ACTIVE', 'PASSIVE', 'PARTICIPLE', 'INFINITE')) if x != 'ei']
+    workloads = [
+        ('nominal', nominal_loop, inflect.nominal_paradigm, nominals),
+        ('verb', verb_loop, inflect.verb_paradigm, verbs),
+    ]
+
+    print(f'{"tables/s":<10} {"per form":>14} {"paradigm":>14} {"speedup":>8}')
+    for name, before, after, lexemes in workloads:
+        for lexeme in lexemes:
+            assert before(lexeme) == after(lexeme), lexeme
+
+        before_rate = tables_per_second(before, lexemes)
+        after_rate = tables_per_second(after, lexemes)
+        print(f'{name:<10} {before_rate:>14,.0f} {after_rate:>14,.0f} {after_rate / before_rate:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
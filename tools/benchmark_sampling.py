@@ -0,0 +1,49 @@
+"""Compare weighted word sampling speeds.
+
+Run from the repository root:
+
+    python -m tools.benchmark_sampling
+"""
+import random
+import time
+from src.sampling import AliasTable
+
+sizes = [100, 1000, 10000, 100000, 500000]
+
+
+def zipf_weights(n):
+    return [1.0 / (rank + 1) for rank in range(n)]
+
+
+def draws_per_second(draw, min_seconds=0.5, draws_per_call=1):
+    count = 0
+    batch = 100
+    start = time.perf_counter()
+    while True:
+        for _ in range(batch):
+            draw()
+        count += batch * draws_per_call
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return count / elapsed
+        batch *= 2
+
+
+def main():
+    print(f'{"size":>8} {"random.choices":>16} {"AliasTable":>16} {"speedup":>8} '
+          f'{"sample(256)":>16} {"speedup":>8}')
+    for n in sizes:
+        words = [f'w{i}' for i in range(n)]
+        weights = zipf_weights(n)
+        table = AliasTable(weights)
+
+        choices_rate = draws_per_second(lambda: random.choices(words, weights=weights)[0])
+        alias_rate = draws_per_second(lambda: words[table.draw()])
+        batch_rate = draws_per_second(lambda: [words[i] for i in table.sample(256)],
+                                      draws_per_call=256)
+        print(f'{n:>8} {choices_rate:>16,.0f} {alias_rate:>16,.0f} {alias_rate / choices_rate:>7.1f}x '
+              f'{batch_rate:>16,.0f} {batch_rate / choices_rate:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
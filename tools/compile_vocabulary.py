@@ -0,0 +1,35 @@
+"""Compile data/vocab/*.txt into memory-mappable binary files.
+
+Run from the repository root:
+
+    python -m tools.compile_vocabulary [--top-n N] [--min-freq F] [--max-bytes B]
+
+The optional arguments keep only the most frequent words of each word class
+(see src.vocabfile.truncate).
+"""
+import argparse
+from pathlib import Path
+from src.vocabfile import read_text, truncate, write_compiled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top-n', type=int, help='keep at most N words per word class')
+    parser.add_argument('--min-freq', type=float, help='drop words less frequent than this')
+    parser.add_argument('--max-bytes', type=int, help='size budget per word class in bytes')
+    args = parser.parse_args()
+    truncation = {'top_n': args.top_n, 'min_freq': args.min_freq, 'max_bytes': args.max_bytes}
+
+    vocab_path = Path('data/vocab')
+    for f in sorted(vocab_path.glob('*.txt')):
+        words, weights = read_text(f)
+        n_words = len(words)
+        if any(x is not None for x in truncation.values()):
+            words, weights = truncate(words, weights, **truncation)
+        outfile = f.with_suffix('.bin')
+        write_compiled(outfile, words, weights)
+        print(f'{outfile}: {len(words)}/{n_words} words')
+
+
+if __name__ == '__main__':
+    main()
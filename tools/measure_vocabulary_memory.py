@@ -0,0 +1,66 @@
+"""Measure the memory used by each vocabulary word class.
+
+Compares the default list storage, parsed from the text file, with
+Vocabulary(compact=True), which memory-maps the compiled .bin file if it
+exists, using tracemalloc. Run from the repository root:
+
+    python -m tools.measure_vocabulary_memory
+"""
+import gc
+import tracemalloc
+from pathlib import Path
+from src.puppu import Vocabulary
+from src.sampling import AliasTable
+from src.vocabfile import read_text
+
+
+def loaded_size(load):
+    """Return the memory allocated by load() and its peak, in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    loaded = load()
+    gc.collect()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del loaded
+    return after - before, peak - before
+
+
+def load_lists(path):
+    # Like Vocabulary(compact=False) loading a text file, even if a
+    # compiled file exists
+    words, weights = read_text(path)
+    return words, weights, AliasTable(weights)
+
+
+def load_compact(vocab_path, word_class):
+    vocabulary = Vocabulary(vocab_path, compact=True)
+    vocabulary.load_word_class(word_class)
+    return vocabulary
+
+
+def main():
+    vocab_path = Path('data/vocab')
+    print(f'{"word class":<12} {"words":>9} {"lists":>12} {"compact":>12} {"ratio":>6} '
+          f'{"peak lists":>12} {"peak compact":>12}')
+    total_lists = total_compact = 0
+    for f in sorted(vocab_path.glob('*.txt')):
+        word_class = f.stem
+        with f.open(encoding='utf-8') as fh:
+            n_words = sum(1 for _ in fh)
+        lists, lists_peak = loaded_size(lambda: load_lists(f))
+        compact, compact_peak = loaded_size(lambda: load_compact(vocab_path, word_class))
+        total_lists += lists
+        total_compact += compact
+        print(f'{word_class:<12} {n_words:>9} {_mb(lists):>12} {_mb(compact):>12} '
+              f'{lists / max(compact, 1):>5.1f}x {_mb(lists_peak):>12} {_mb(compact_peak):>12}')
+    print(f'{"total":<12} {"":>9} {_mb(total_lists):>12} {_mb(total_compact):>12}')
+
+
+def _mb(n_bytes):
+    return f'{n_bytes / 1e6:.2f} MB'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Precompute compound word splits for the nominal word classes.
+
+Writes data/vocab/compound_splits.tsv with one line per lemma:
+word, modifier and element separated by tabs. When the file exists, the
+generator loads it at startup and does not need to run Voikko analysis for
+these words. Run from the repository root:
+
+    python -m tools.precompute_compound_splits
+"""
+from pathlib import Path
+from src.inflect import _split_compound_word, word_classes
+from src.vocabfile import read_text
+
+nominal_word_classes = ['nimisana', 'laatusana', 'lukusana']
+
+
+def main():
+    vocab_path = Path('data/vocab')
+    outfile = vocab_path / 'compound_splits.tsv'
+    words = set()
+    for word_class in nominal_word_classes:
+        f = vocab_path / (word_class + '.txt')
+        if f.exists():
+            words.update(w for w in read_text(f)[0] if w not in word_classes())
+
+    n_compounds = 0
+    with open(outfile, 'w', encoding='utf-8') as outf:
+        for word in sorted(words):
+            modifier, element = _split_compound_word(word)
+            if modifier:
+                n_compounds += 1
+            outf.write(f'{word}\t{modifier}\t{element}\n')
+
+    print(f'Wrote {len(words)} words ({n_compounds} compounds) to {outfile}')
+
+
+if __name__ == '__main__':
+    main()
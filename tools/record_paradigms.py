@@ -0,0 +1,57 @@
+"""Record the paradigms of the vocabulary for the table morphology backend.
+
+Inflects the verbs and nominals of data/vocab in all supported forms with
+Voikko, and writes the paradigms, inflection classes and compound word
+analyses that were needed to data/vocab/paradigms.sqlite3. When the file
+exists, the generator reads the paradigms from it and runs Voikko only for
+words that are missing from it. Run from the repository root:
+
+    python -m tools.record_paradigms [--top-n N]
+
+--top-n records only the N most frequent words of each word class.
+"""
+import argparse
+import functools
+from pathlib import Path
+from src import inflect
+from src.morphology import RecordingBackend, VoikkoBackend
+from src.vocabfile import read_text, truncate
+
+# Only adjectives are compared. The comparative and superlative
+# paradigms of other nominals would add made-up lexemes to the table.
+paradigm_functions = {
+    'teonsana': inflect.verb_paradigm,
+    'nimisana': functools.partial(inflect.nominal_paradigm, degrees=(None,)),
+    'laatusana': inflect.nominal_paradigm,
+    'lukusana': functools.partial(inflect.nominal_paradigm, degrees=(None,)),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top-n', type=int, help='record at most N words per word class')
+    args = parser.parse_args()
+
+    vocab_path = Path('data/vocab')
+    outfile = vocab_path / 'paradigms.sqlite3'
+    recorder = RecordingBackend(VoikkoBackend())
+    inflect.set_backend(recorder)
+
+    for word_class, paradigm in paradigm_functions.items():
+        f = vocab_path / (word_class + '.txt')
+        if not f.exists():
+            continue
+        words, weights = read_text(f)
+        if args.top_n is not None:
+            words, _ = truncate(words, weights, top_n=args.top_n)
+        for word in words:
+            paradigm(word)
+        print(f'{word_class}: {len(words)} words')
+
+    inflect.verb_paradigm('olla')
+    recorder.write(outfile)
+    print(f'Wrote {len(recorder.paradigms)} paradigms to {outfile}')
+
+
+if __name__ == '__main__':
+    main()